@@ -6,11 +6,13 @@ import os
 import re
 import sqlite3
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from random import random
-from typing import Any, Dict, Iterator, Union
+from typing import Any, Dict, Iterator, List, Union
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import typer
 import yaml
@@ -18,6 +20,11 @@ from click import get_current_context
 from matplotlib.lines import Line2D
 from ydata_profiling import ProfileReport
 
+try:  # public since pandas 2.2
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pragma: no cover
+    from pandas.core.tools.datetimes import guess_datetime_format
+
 app = typer.Typer(
     help="🛠️  **Data Profiling CLI**: generate profiling reports and monitor performance trends.",
     add_completion=True,
@@ -64,6 +71,254 @@ def reservoir_sample(
     return pd.DataFrame(reservoir, columns=cols)
 
 
+# ─── Compact dtypes ────────────────────────────────────────────────────────
+INT_TYPES = ("int8", "int16", "int32", "int64")
+STRING_DTYPE = "string[pyarrow]"
+
+
+def _int_type(lo: float, hi: float) -> str:
+    """Smallest signed integer type holding [lo, hi]."""
+    for name in INT_TYPES:
+        info = np.iinfo(name)
+        if info.min <= lo and hi <= info.max:
+            return name
+    return "int64"
+
+
+def _float_type(values: pd.Series) -> str:
+    """``float32`` when every value survives the round trip, else ``float64``."""
+    values = values.dropna().astype("float64")
+    narrow = values.astype("float32").astype("float64")
+    return "float32" if (narrow == values).all() else "float64"
+
+
+def _datetime_format(values: pd.Series) -> Union[str, None]:
+    """A strftime format that parses every (non-null) sample value, else None."""
+    values = values.dropna().astype(str)
+    if values.empty:
+        return None
+    fmt = guess_datetime_format(values.iat[0])
+    if fmt is None:
+        return None
+    parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+    return fmt if parsed.notna().all() else None
+
+
+def learn_schema(
+    sample: pd.DataFrame,
+    max_categories: int = 1_000,
+    category_ratio: float = 0.5,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Infer a compact dtype per column from the first chunk(s).
+
+    Returns ``{column: {"kind": ..., ...}}`` with kinds ``int`` (smallest
+    width, nullable when NaNs are present), ``float`` (float32 when
+    lossless), ``datetime`` (one strftime format that parses every value,
+    applied when the chunks are joined), ``category`` (shared
+    dictionary) and ``string`` (Arrow-backed); other columns are ``keep``.
+    """
+    schema: Dict[str, Dict[str, Any]] = {}
+    for col in sample.columns:
+        s = sample[col]
+        if pd.api.types.is_bool_dtype(s):
+            schema[col] = {"kind": "keep"}
+        elif pd.api.types.is_integer_dtype(s):
+            schema[col] = {"kind": "int", "dtype": _int_type(s.min(), s.max())}
+        elif pd.api.types.is_float_dtype(s):
+            finite = s.dropna()
+            if not finite.empty and (finite == finite.round()).all():
+                # integers stored as float because of missing values
+                dtype = _int_type(finite.min(), finite.max()).capitalize()
+                schema[col] = {"kind": "int", "dtype": dtype}
+            else:
+                schema[col] = {"kind": "float", "dtype": _float_type(s)}
+        elif s.dtype == object:
+            fmt = _datetime_format(s)
+            uniques = s.dropna().unique()
+            few = min(max_categories, category_ratio * max(s.notna().sum(), 1))
+            if fmt:
+                schema[col] = {"kind": "datetime", "format": fmt}
+            elif len(uniques) <= few:
+                schema[col] = {
+                    "kind": "category",
+                    "categories": sorted(map(str, uniques)),
+                    "max": max_categories,
+                }
+            else:
+                schema[col] = {"kind": "string"}
+        else:
+            schema[col] = {"kind": "keep"}
+    return schema
+
+
+def _widen(series: pd.Series, spec: Dict[str, Any]) -> None:
+    """Grow an integer spec in place when a later chunk exceeds its range."""
+    values = series.dropna()
+    if values.empty:
+        return
+    nullable = spec["dtype"][0].isupper()
+    info = np.iinfo(spec["dtype"].lower())
+    if values.min() < info.min or values.max() > info.max:
+        wider = _int_type(min(values.min(), info.min), max(values.max(), info.max))
+        spec["dtype"] = wider.capitalize() if nullable else wider
+
+
+def apply_schema(
+    chunk: pd.DataFrame, schema: Dict[str, Dict[str, Any]]
+) -> pd.DataFrame:
+    """Convert one chunk to the learned schema, updating the spec as needed."""
+    out = {}
+    for col in chunk.columns:
+        s, spec = chunk[col], schema.get(col, {"kind": "keep"})
+        kind = spec["kind"]
+        try:
+            if kind == "int":
+                if s.isna().any() and spec["dtype"][0].islower():
+                    spec["dtype"] = spec["dtype"].capitalize()  # NaNs appeared
+                if s.dropna().mod(1).any():
+                    spec.update(kind="float", dtype=_float_type(s))  # fractions
+                    s = s.astype(spec["dtype"])
+                else:
+                    _widen(s, spec)
+                    s = s.astype(spec["dtype"])
+            elif kind == "float":
+                if spec["dtype"] == "float32":
+                    spec["dtype"] = _float_type(s)  # float64 once lossy
+                s = s.astype(spec["dtype"])
+            elif kind == "datetime":
+                # only checked here: the text is parsed in concat_chunks, once
+                # no later chunk can demote the column
+                parsed = pd.to_datetime(s, format=spec["format"], errors="coerce")
+                if parsed.isna().sum() > s.isna().sum():
+                    typer.secho(
+                        f"⚠️ Unparseable datetime in col {col}, keeping it as text",
+                        fg=typer.colors.YELLOW,
+                    )
+                    spec.clear()
+                    spec["kind"] = "keep"
+            elif kind == "category":
+                s = s.astype(object).where(s.isna(), s.astype(str))
+                new = set(s.dropna().unique()) - set(spec["categories"])
+                if len(spec["categories"]) + len(new) > spec["max"]:
+                    spec.clear()
+                    spec["kind"] = "string"  # cardinality exploded
+                    s = s.astype(STRING_DTYPE)
+                else:
+                    spec["categories"].extend(sorted(new))
+                    s = pd.Categorical(s, categories=spec["categories"])
+            elif kind == "string":
+                s = s.astype(STRING_DTYPE)
+        except (TypeError, ValueError):  # unexpected values: leave as read
+            spec.clear()
+            spec["kind"] = "keep"
+            s = chunk[col]
+        out[col] = s
+    return pd.DataFrame(out, index=chunk.index)
+
+
+def concat_chunks(
+    parts: list, schema: Union[Dict[str, Dict[str, Any]], None]
+) -> pd.DataFrame:
+    """Concatenate chunks, first aligning each column to its final schema."""
+    if schema:
+        for i, part in enumerate(parts):
+            fixes = {}
+            for col, spec in schema.items():
+                if col not in part:
+                    continue
+                if spec["kind"] == "category":
+                    fixes[col] = part[col].cat.set_categories(spec["categories"])
+                elif spec["kind"] in ("int", "float"):
+                    fixes[col] = part[col].astype(spec["dtype"])
+                elif spec["kind"] == "datetime":
+                    fixes[col] = pd.to_datetime(part[col], format=spec["format"])
+                elif spec["kind"] == "string":
+                    fixes[col] = part[col].astype(STRING_DTYPE)
+            parts[i] = part.assign(**fixes)
+    return pd.concat(parts, ignore_index=True)
+
+
+def memory_report(before: Dict[str, int], after: Dict[str, int]) -> list:
+    """Rows of (column, bytes before, bytes after, saved fraction), largest saving first."""
+    rows = [
+        (col, before[col], after.get(col, 0), 1 - after.get(col, 0) / before[col])
+        for col in before
+        if before[col]
+    ]
+    return sorted(rows, key=lambda r: r[1] - r[2], reverse=True)
+
+
+def _add_usage(totals: Dict[str, int], df: pd.DataFrame) -> None:
+    for col, n in df.memory_usage(deep=True, index=False).items():
+        totals[col] = totals.get(col, 0) + int(n)
+
+
+def _mb(n: int) -> str:
+    return f"{n / 2**20:.1f} MB"
+
+
+def write_dtype_report(
+    out: Path,
+    schema: Dict[str, Dict[str, Any]],
+    before: Dict[str, int],
+    df: pd.DataFrame,
+) -> Path:
+    """Echo memory saved per column and write it with the schema to dtypes.json."""
+    after: Dict[str, int] = {}
+    _add_usage(after, df)
+    rows = memory_report(before, after)
+    total_before, total_after = sum(before.values()), sum(after.values())
+    typer.echo(
+        f"🗜️ Compact dtypes: {_mb(total_before)} → {_mb(total_after)} "
+        f"({1 - total_after / max(total_before, 1):.0%} saved)"
+    )
+    for col, b, a, saved in rows[:10]:
+        typer.echo(f"   {col}: {df[col].dtype} {_mb(b)} → {_mb(a)} ({saved:.0%})")
+    path = out / "dtypes.json"
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "columns": {
+                    col: {
+                        "dtype": str(df[col].dtype),
+                        "kind": schema.get(col, {}).get("kind", "keep"),
+                        "bytes_before": b,
+                        "bytes_after": a,
+                        "saved": round(saved, 4),
+                    }
+                    for col, b, a, saved in rows
+                },
+                "bytes_before": total_before,
+                "bytes_after": total_after,
+            },
+            f,
+            indent=2,
+        )
+    return path
+
+
+# ─── Stored statistics ─────────────────────────────────────────────────────
+STATS_FILE = "report.pp"
+
+
+def write_outputs(report: ProfileReport, stats: Path, html: bool, json_out: bool):
+    """Render report.html / report.json next to ``stats``; returns the paths."""
+    paths = []
+    if html:
+        paths.append(stats.with_suffix(".html"))
+    if json_out:
+        paths.append(stats.with_suffix(".json"))
+    for path in paths:
+        report.to_file(path)
+    return paths
+
+
+def render_stored(stats: Path, html: bool = True, json_out: bool = False):
+    """Load a description persisted by ``profile`` and render it (no recompute)."""
+    return write_outputs(ProfileReport().load(stats), stats, html, json_out)
+
+
 @app.command("profile", no_args_is_help=True)
 def profile(
     # ─── I/O Options ───────────────────────────────────────────────
@@ -118,10 +373,23 @@ def profile(
         "--json-out",
         help="📦 Also emit JSON report.",
     ),
+    render: bool = typer.Option(
+        True,
+        "--render/--no-render",
+        help="🖼️ Render the HTML report now; with --no-render only the computed "
+        "statistics are stored (see `dataprof render`).",
+    ),
+    optimize: bool = typer.Option(
+        False,
+        "--optimize/--no-optimize",
+        help="🗜️ Compact dtypes (downcast numerics when lossless, categoricals, "
+        "Arrow strings, cleanly parsed datetimes) before profiling.",
+    ),
 ):
     """
     Generate HTML (and optional JSON) profiling reports,
     with sampling, custom configs, and GE stubs.
+    The computed statistics are kept in report.pp for `dataprof render`.
     """
     os.makedirs(out, exist_ok=True)
 
@@ -154,10 +422,16 @@ def profile(
         with open(config) as cf:
             report_kwargs.update(yaml.safe_load(cf))
 
-    # 4) Ingest & sample
+    # 4) Ingest & sample (the compact schema is learned from the first chunk)
+    schema: Union[Dict[str, Dict[str, Any]], None] = None
+    before: Dict[str, int] = {}
     if reservoir_size:
         df = reservoir_sample(filepath, reservoir_size, chunksize, reader_kwargs)
         typer.echo(f"🌀 Reservoir sample of {len(df)} rows")
+        if optimize:
+            schema = learn_schema(df)
+            _add_usage(before, df)
+            df = concat_chunks([apply_schema(df, schema)], schema)
     else:
         parts = []
         dt_re = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
@@ -173,23 +447,33 @@ def profile(
                             f"⚠️ Invalid datetime in chunk {i}, col {col}",
                             fg=typer.colors.YELLOW,
                         )
+            if optimize:
+                schema = schema if schema is not None else learn_schema(chunk)
+                _add_usage(before, chunk)
+                chunk = apply_schema(chunk, schema)
             mini = ProfileReport(chunk, **report_kwargs)
             mini_path = out / f"chunk_{i:03d}.json"
             mini.to_file(mini_path)
             typer.echo(f"➡️ Chunk {i} summary → {mini_path}")
             parts.append(chunk)
-        df = pd.concat(parts, ignore_index=True)
+        df = concat_chunks(parts, schema)
+    if schema is not None:
+        write_dtype_report(out, schema, before, df)
 
-    # 5) Full profiling
+    # 5) Full profiling: compute once, store, render what was asked for
     report = ProfileReport(df, **report_kwargs)
-    html = out / "report.html"
-    report.to_file(html)
-    typer.secho(f"✅ HTML report → {html}", fg=typer.colors.GREEN)
+    report.get_description()
+    stats = out / STATS_FILE
+    report.dump(stats)
+    typer.echo(f"🧮 Statistics → {stats}")
 
-    if json_out:
-        jpath = out / "report.json"
-        report.to_file(jpath)
-        typer.echo(f"📦 JSON report → {jpath}")
+    for path in write_outputs(report, stats, render, json_out):
+        if path.suffix == ".html":
+            typer.secho(f"✅ HTML report → {path}", fg=typer.colors.GREEN)
+        else:
+            typer.echo(f"📦 JSON report → {path}")
+    if not render:
+        typer.echo(f"🖼️ Render later with: dataprof render {out}")
 
     # 6) Persist metadata
     dur = time.time() - start
@@ -222,6 +506,70 @@ def profile(
     typer.echo(f"⏱ Completed in {dur:.2f}s")
 
 
+def _echo_rendered(stats: Path, result) -> int:
+    """Echo the outcome of one render; 1 if it failed (the batch goes on)."""
+    try:
+        paths = result()
+    except Exception as exc:
+        typer.secho(f"❌ {stats}: {exc}", fg=typer.colors.RED, err=True)
+        return 1
+    for path in paths:
+        typer.secho(f"✅ {path}", fg=typer.colors.GREEN)
+    return 0
+
+
+@app.command("render", no_args_is_help=True)
+def render(
+    runs: List[Path] = typer.Argument(
+        ...,
+        exists=True,
+        help="📂 Output directories (or report.pp files) written by `profile`.",
+    ),
+    html: bool = typer.Option(True, "--html/--no-html", help="🖼️ Emit HTML report."),
+    json_out: bool = typer.Option(
+        False,
+        "--json-out",
+        help="📦 Also emit JSON report.",
+    ),
+    jobs: int = typer.Option(
+        os.cpu_count() or 1,
+        "--jobs",
+        "-j",
+        help="⚡ Runs rendered in parallel (one process each).",
+    ),
+):
+    """
+    Render HTML/JSON reports from statistics stored by `profile`,
+    without recomputing them.
+    """
+    if not (html or json_out):
+        typer.secho("⚠️ Nothing to render (--no-html without --json-out)", err=True)
+        raise typer.Exit(2)
+    stats = [run / STATS_FILE if run.is_dir() else run for run in runs]
+    missing = [p for p in stats if not p.exists()]
+    if missing:
+        for p in missing:
+            typer.secho(
+                f"❌ No stored statistics at {p}", fg=typer.colors.RED, err=True
+            )
+        raise typer.Exit(1)
+
+    start, failed = time.time(), 0
+    workers = max(1, min(jobs, len(stats)))
+    if workers == 1:  # skip the process start-up cost
+        for p in stats:
+            failed += _echo_rendered(p, lambda: render_stored(p, html, json_out))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(render_stored, p, html, json_out): p for p in stats}
+            for future in as_completed(futures):
+                failed += _echo_rendered(futures[future], future.result)
+
+    typer.echo(f"⏱ Rendered {len(stats) - failed} run(s) in {time.time() - start:.2f}s")
+    if failed:
+        raise typer.Exit(1)
+
+
 @app.command("plot-trends")
 def plot_trends(
     db: Path = typer.Option(Path("runs.db"), "--db", help="SQLite DB of past runs.")
@@ -1,5 +1,11 @@
+import json
+import os
 import subprocess
 import sys
+from pathlib import Path
+
+import pandas as pd
+from dataprof.cli import apply_schema, concat_chunks, learn_schema
 
 
 def test_expectations_exit_code(tmp_path):
@@ -28,3 +34,74 @@ def test_expectations_exit_code(tmp_path):
     # 3) Should exit non-zero and create expectations.json
     assert result.returncode != 0
     assert (outdir / "expectations.json").exists()
+
+
+def test_compact_dtypes_adapt_across_chunks():
+    first = pd.DataFrame(
+        {
+            "n": [1, 2, 3, 4],
+            "city": ["Oslo", "Rome", "Oslo", "Rome"],
+            "ts": ["2024-01-01 10:00:00"] * 4,
+            "x": [0.5, 1.5, 2.5, 3.5],
+        }
+    )
+    later = pd.DataFrame(
+        {
+            "n": [None, 70_000, 5, 6],
+            "city": ["Lima", "Oslo", None, "Rome"],
+            "ts": ["2024-01-02 11:30:00"] * 4,
+            "x": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    schema = learn_schema(first)
+    parts = [apply_schema(first, schema), apply_schema(later, schema)]
+    df = concat_chunks(parts, schema)
+
+    assert str(df["n"].dtype) == "Int32"  # widened and made nullable
+    assert list(df["city"].cat.categories) == ["Oslo", "Rome", "Lima"]
+    assert pd.api.types.is_datetime64_any_dtype(df["ts"])
+    assert str(df["x"].dtype) == "float32"
+    assert len(df) == 8 and df["n"].isna().sum() == 1
+
+
+def test_compact_dtypes_never_lose_information(capsys):
+    first = pd.DataFrame(
+        {"x": [0.1, 0.2, 0.3], "y": [0.5, 1.5, 2.5], "ts": ["2024-1-5"] * 3}
+    )
+    later = pd.DataFrame(
+        {
+            "x": [0.4, 0.5, 0.6],
+            "y": [1e-9, 2.5, 3.5],
+            "ts": ["2024-3-9", "soon", None],
+        }
+    )
+    schema = learn_schema(first)
+    assert schema["x"] == {"kind": "float", "dtype": "float64"}
+    parts = [apply_schema(first, schema), apply_schema(later, schema)]
+    df = concat_chunks(parts, schema)
+
+    assert df["x"].dtype == "float64" and df["y"].dtype == "float64"
+    assert df["y"].iat[3] == 1e-9
+    assert schema["ts"]["kind"] == "keep"
+    assert df["ts"].dtype == object
+    assert df["ts"].tolist()[:5] == ["2024-1-5"] * 3 + ["2024-3-9", "soon"]
+    assert "Unparseable datetime in col ts" in capsys.readouterr().out
+    assert learn_schema(later)["ts"]["kind"] != "datetime"
+
+
+def test_render_reuses_stored_statistics(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a,b\n1,x\n2,y\n3,x\n")
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+
+    def dataprof(*args):
+        cmd = [sys.executable, "-m", "dataprof", *args]
+        return subprocess.run(cmd, cwd=tmp_path, env=env, capture_output=True)
+
+    assert dataprof("profile", str(data), "--out", "run", "--no-render").returncode == 0
+    assert (tmp_path / "run" / "report.pp").exists()
+    assert not (tmp_path / "run" / "report.html").exists()
+
+    assert dataprof("render", "run", "--json-out", "--jobs", "1").returncode == 0
+    assert (tmp_path / "run" / "report.html").exists()
+    assert json.loads((tmp_path / "run" / "report.json").read_text())["table"]["n"] == 3
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Load-test the end-to-end ``audit-eval run`` path (rate limiter, retries,
+grader, SQLite writes) against the bundled mock server.
+
+    python scripts/bench_run.py --rows 2000 --concurrency 50,200,500 \\
+        --latency lognormal:0.3,0.6 --error-429 0.02 --error-5xx 0.01
+
+The mock runs in a subprocess so the reported CPU time is the client's own.
+Each concurrency level gets a fresh run database under --workdir.
+"""
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import typer
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def _start_mock(options: list[str]) -> tuple[subprocess.Popen, str]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC), os.environ.get("PYTHONPATH", "")]),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "prompt_audit.mock_server", "--port", "0", *options],
+        stdout=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    line = proc.stdout.readline()  # "mock server listening on http://…/v1"
+    if not line:
+        typer.secho("mock server failed to start", fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+    return proc, line.rsplit(" ", 1)[-1].strip()
+
+
+def _write_dataset(path: Path, rows: int) -> None:
+    with path.open("w") as fh:
+        fh.write("question,ground_truth\n")
+        for i in range(rows):
+            fh.write(f"What is item {i}?,answer {i}\n")
+
+
+def main(
+    rows: int = typer.Option(1000, help="Synthetic dataset rows."),
+    concurrency: str = typer.Option(
+        "50,100,200,500", help="Comma-separated concurrency levels to sweep."
+    ),
+    latency: str = "lognormal:0.3,0.5",
+    error_429: float = 0.0,
+    error_5xx: float = 0.0,
+    rpm: int = typer.Option(60_000, help="Mock server quota."),
+    tpm: int = 50_000_000,
+    workdir: Path = typer.Option(None),
+    json_out: Path = typer.Option(None),
+):
+    """Sweep concurrency levels; report QPS, tail latency, retry amplification and CPU/call."""
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="bench_run_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    proc, base_url = _start_mock(
+        [
+            "--latency", latency,
+            "--error-429", str(error_429),
+            "--error-5xx", str(error_5xx),
+            "--rpm", str(rpm),
+            "--tpm", str(tpm),
+            "--seed", "0",
+        ]
+    )  # fmt: skip
+    # Settings are read at import time, so configure before importing
+    os.environ.update(
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "mock"),
+        OPENAI_BASE_URL=base_url,
+        OPENAI_RPM_LIMIT=str(rpm),
+        OPENAI_TPM_LIMIT=str(tpm),
+        OPENAI_MAX_CONNECTIONS=str(max(int(c) for c in concurrency.split(","))),
+        PROMPT_AUDIT_LOG_SAMPLE_RATE=os.environ.get(
+            "PROMPT_AUDIT_LOG_SAMPLE_RATE", "0"
+        ),
+    )
+    sys.path.insert(0, str(SRC))
+    import audit_eval.catalog as cat
+    import audit_eval.dataset as ds
+    import audit_eval.grader as gr
+    import httpx
+    from audit_eval import cli
+    from prompt_audit import metrics
+    from rich.console import Console
+    from rich.table import Table
+
+    ds.CSV = workdir / "queries.csv"
+    _write_dataset(ds.CSV, rows)
+    stats_url = base_url.removesuffix("/v1") + "/stats"
+    results = []
+    try:
+        for level in (int(c) for c in concurrency.split(",")):
+            out = workdir / f"c{level}"
+            out.mkdir(exist_ok=True)
+            gr._OUT_DIR = cat.OUT_DIR = out
+            cat.CATALOG = out / "catalog.sqlite"
+            gr.close_run()
+            metrics.REGISTRY.reset()
+            sent_before = httpx.get(stats_url).json().get("requests", 0)
+
+            cpu, wall = time.process_time(), time.perf_counter()
+            error = None
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    cli.run(
+                        sample=1.0,
+                        concurrency=level,
+                        audit_rate=0.0,
+                        seed=42,
+                        resume=None,
+                        checkpoint_every=100,
+                        data=None,
+                    )
+            except Exception as exc:  # report the level, keep sweeping
+                error = type(exc).__name__
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+
+            calls = metrics.CALLS.total()
+            sent = httpx.get(stats_url).json().get("requests", 0) - sent_before
+            run = sqlite3.connect(gr.run_path())
+            p50, p95, p99 = cat.quantiles(run, "calls", "latency_s", (0.5, 0.95, 0.99))
+            (queue_p95,) = cat.quantiles(run, "calls", "queue_s", (0.95,))
+            (graded,) = run.execute("SELECT COUNT(*) FROM eval").fetchone()
+            run.close()
+            results.append(
+                {
+                    "concurrency": level,
+                    "rows": graded,
+                    "calls": int(calls),
+                    "qps": calls / wall if wall else 0.0,
+                    "latency_p50_s": p50,
+                    "latency_p95_s": p95,
+                    "latency_p99_s": p99,
+                    "queue_p95_s": queue_p95,
+                    "retries": int(metrics.RETRIES.total()),
+                    "amplification": sent / calls if calls else None,
+                    "cpu_ms_per_call": 1000 * cpu / calls if calls else None,
+                    "wall_s": wall,
+                    "error": error,
+                }
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    table = Table(title=f"audit-eval run vs mock ({rows} rows, latency {latency})")
+    for col in results[0] if results else ():
+        table.add_column(col, justify="right")
+    for res in results:
+        table.add_row(
+            *(f"{v:.3f}" if isinstance(v, float) else str(v) for v in res.values())
+        )
+    Console().print(table)
+    if json_out:
+        json_out.write_text(json.dumps(results, indent=2))
+        typer.echo(f"Results written to {json_out}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
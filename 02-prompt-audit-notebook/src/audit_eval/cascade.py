@@ -0,0 +1,307 @@
+"""
+Local, CPU-only grading tiers that run before the LLM judge.
+
+Each tier looks at (reference, answer, aliases) and either abstains (None) or
+returns a `Verdict` with a confidence in [0, 1].  The cascade accepts the first
+verdict whose confidence clears that tier's threshold; anything left over is
+genuinely ambiguous and goes to the judge.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from difflib import SequenceMatcher
+from typing import Callable, Iterable, Sequence
+
+
+@dataclass(frozen=True)
+class Verdict:
+    passed: bool
+    confidence: float
+    tier: str = ""
+
+
+TierFn = Callable[[str, str, Sequence[str]], "Verdict | None"]
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    fn: TierFn
+    threshold: float
+
+
+# --------------------------------------------------------------------------- #
+# Text normalisation
+# --------------------------------------------------------------------------- #
+_ARTICLES = re.compile(r"\b(a|an|the)\b")
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """NFKC, strip accents, casefold, drop punctuation/articles, squash spaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _PUNCT.sub(" ", text)
+    text = _ARTICLES.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _contains(haystack: str, needle: str) -> bool:
+    """Whole-word containment of normalised `needle` in normalised `haystack`."""
+    return bool(needle) and f" {needle} " in f" {haystack} "
+
+
+# --------------------------------------------------------------------------- #
+# Tiers
+# --------------------------------------------------------------------------- #
+def exact_tier(reference: str, answer: str, aliases: Sequence[str]) -> Verdict | None:
+    """The original case-insensitive substring shortcut."""
+    if reference.lower() in answer.lower():
+        return Verdict(True, 1.0)
+    return None
+
+
+def alias_tier(reference: str, answer: str, aliases: Sequence[str]) -> Verdict | None:
+    norm_answer = normalize(answer)
+    if any(_contains(norm_answer, normalize(a)) for a in aliases):
+        return Verdict(True, 1.0)
+    return None
+
+
+def normalized_tier(
+    reference: str, answer: str, aliases: Sequence[str]
+) -> Verdict | None:
+    if _contains(normalize(answer), normalize(reference)):
+        return Verdict(True, 0.98)
+    return None
+
+
+# value → (dimension, factor to the dimension's base unit)
+_UNITS: dict[str, tuple[str, float]] = {
+    "mm": ("length", 0.001),
+    "cm": ("length", 0.01),
+    "m": ("length", 1.0),
+    "meter": ("length", 1.0),
+    "meters": ("length", 1.0),
+    "metre": ("length", 1.0),
+    "metres": ("length", 1.0),
+    "km": ("length", 1000.0),
+    "kilometers": ("length", 1000.0),
+    "kilometres": ("length", 1000.0),
+    "in": ("length", 0.0254),
+    "inches": ("length", 0.0254),
+    "ft": ("length", 0.3048),
+    "feet": ("length", 0.3048),
+    "mi": ("length", 1609.344),
+    "miles": ("length", 1609.344),
+    "mg": ("mass", 1e-6),
+    "g": ("mass", 0.001),
+    "grams": ("mass", 0.001),
+    "kg": ("mass", 1.0),
+    "kilograms": ("mass", 1.0),
+    "lb": ("mass", 0.45359237),
+    "lbs": ("mass", 0.45359237),
+    "pounds": ("mass", 0.45359237),
+    "s": ("time", 1.0),
+    "sec": ("time", 1.0),
+    "seconds": ("time", 1.0),
+    "min": ("time", 60.0),
+    "minutes": ("time", 60.0),
+    "h": ("time", 3600.0),
+    "hours": ("time", 3600.0),
+    "%": ("ratio", 0.01),
+    "percent": ("ratio", 0.01),
+}
+_SCALE = {"thousand": 1e3, "million": 1e6, "billion": 1e9, "trillion": 1e12}
+_NUMBER_RE = re.compile(
+    r"(?<![\w.])(-?\d{1,3}(?:,\d{3})+(?:\.\d+)?|-?\d+(?:\.\d+)?)"
+    r"\s*(thousand|million|billion|trillion)?"
+    r"\s*(%|[a-zA-Z]+)?"
+)
+
+
+def _quantities(text: str) -> list[tuple[float, float, str, str]]:
+    found = []
+    for num, scale, unit in _NUMBER_RE.findall(text):
+        raw = float(num.replace(",", "")) * _SCALE.get(scale.lower(), 1.0)
+        dim, factor = _UNITS.get(unit.lower(), ("", 1.0)) if unit else ("", 1.0)
+        found.append((raw, raw * factor, dim, unit))
+    return found
+
+
+def quantities(text: str) -> list[tuple[float, float, str]]:
+    """Extract (raw value, value in base unit, dimension); bare numbers get ''."""
+    return [(raw, value, dim) for raw, value, dim, _ in _quantities(text)]
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+
+
+def numeric_tier(reference: str, answer: str, aliases: Sequence[str]) -> Verdict | None:
+    ref = quantities(reference)
+    if len(ref) != 1 or normalize(_NUMBER_RE.sub(" ", reference)):
+        return None  # only purely numeric references
+    raw, value, dim = ref[0]
+    figures = _quantities(answer)
+    if dim:  # compare converted values within the same dimension
+        found = [v for _, v, d, _ in figures if d == dim]
+        found += [r for r, _, d, _ in figures if not d]
+        same_kind = [v for _, v, d, u in figures if d == dim or not u]
+        target = value
+    else:  # bare number: ignore units (avoids "born 1990 in Paris" → inches)
+        found = [r for r, _, _, _ in figures]
+        same_kind = [r for r, _, _, u in figures if not u]
+        target = raw
+    if any(_close(v, target) for v in found):
+        return Verdict(True, 0.97)
+    if len(figures) == len(same_kind) == 1:  # one competing figure, same kind
+        return Verdict(False, 0.9)
+    return None  # e.g. "1.5m": a suffix we cannot compare, let the judge decide
+
+
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d %B %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%b %d %Y",
+    "%B %Y",
+)
+_DATE_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}"
+    r"|\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]{3,9},?\s+\d{4}"
+    r"|[A-Za-z]{3,9}\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}"
+    r"|[A-Za-z]{3,9}\s+\d{4}"
+)
+_ORDINAL = re.compile(r"(\d)(st|nd|rd|th)\b")
+
+
+def _parse_date(text: str) -> tuple[date, bool] | None:
+    """(date, whether the day is given); month-only dates fall on the 1st."""
+    text = _ORDINAL.sub(r"\1", text.replace(",", " "))
+    text = _SPACES.sub(" ", text).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date(), "%d" in fmt
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(text: str) -> date | None:
+    parsed = _parse_date(text)
+    return parsed and parsed[0]
+
+
+def date_tier(reference: str, answer: str, aliases: Sequence[str]) -> Verdict | None:
+    ref = _parse_date(reference)
+    if ref is None:
+        return None
+    ref_date, ref_day = ref
+    seen = {d for d in map(_parse_date, _DATE_RE.findall(answer)) if d is not None}
+    for found, has_day in seen:
+        if ref_day and has_day and found == ref_date:
+            return Verdict(True, 0.97)
+        if not ref_day and found.replace(day=1) == ref_date:
+            return Verdict(True, 0.97)  # any day in the reference month
+    if len(seen) == 1 and next(iter(seen))[1] == ref_day:
+        return Verdict(False, 0.9)  # one competing date at the same precision
+    return None
+
+
+def _token_similarity(x: str, y: str) -> float:
+    if x == y:
+        return 1.0
+    if len(x) < 4 or len(y) < 4 or any(c.isdigit() for c in x + y):
+        return 0.0  # "I" vs "II", "1914" vs "1918": no partial credit
+    return SequenceMatcher(None, x, y).ratio()
+
+
+def _coverage(src: set[str], dst: set[str]) -> float:
+    """Mean best-match similarity of each token in `src` against `dst`."""
+    return sum(max(_token_similarity(x, y) for y in dst) for x in src) / len(src)
+
+
+def token_set_ratio(a: str, b: str) -> float:
+    """
+    Order-insensitive similarity (0–1) that needs *both* token sets covered,
+    so a subset ("York" vs "New York City") scores low; long tokens may
+    differ by a typo.
+    """
+    ta, tb = set(a.split()), set(b.split())
+    if not ta or not tb:
+        return 0.0
+    return min(_coverage(ta, tb), _coverage(tb, ta))
+
+
+def fuzzy_tier(reference: str, answer: str, aliases: Sequence[str]) -> Verdict | None:
+    ref = normalize(reference)
+    if not ref:
+        return None
+    score = token_set_ratio(ref, normalize(answer))
+    return Verdict(True, score) if score >= 0.5 else None
+
+
+DEFAULT_TIERS: tuple[Tier, ...] = (
+    Tier("exact", exact_tier, 1.0),
+    Tier("alias", alias_tier, 1.0),
+    Tier("normalized", normalized_tier, 0.95),
+    Tier("numeric", numeric_tier, 0.9),
+    Tier("date", date_tier, 0.9),
+    Tier("fuzzy", fuzzy_tier, 0.92),
+)
+
+
+# --------------------------------------------------------------------------- #
+# Cascade
+# --------------------------------------------------------------------------- #
+@dataclass
+class Cascade:
+    """
+    Ordered tiers + hit counters.  `audit_rate` sends that fraction of local
+    verdicts to the judge as well, so tier precision can be measured.
+    """
+
+    tiers: Sequence[Tier] = DEFAULT_TIERS
+    audit_rate: float = 0.0
+    seed: int = 42
+    hits: Counter = field(default_factory=Counter)
+    audits: Counter = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+
+    def grade(
+        self, reference: str, answer: str, aliases: Iterable[str] = ()
+    ) -> Verdict | None:
+        aliases = [a for a in aliases if a]
+        for tier in self.tiers:
+            verdict = tier.fn(reference, answer, aliases)
+            if verdict is not None and verdict.confidence >= tier.threshold:
+                self.hits[tier.name] += 1
+                return Verdict(verdict.passed, verdict.confidence, tier.name)
+        self.hits["judge"] += 1
+        return None
+
+    def should_audit(self) -> bool:
+        return self.audit_rate > 0 and self._rng.random() < self.audit_rate
+
+    def record_audit(self, verdict: Verdict, judge_passed: bool) -> None:
+        key = "agree" if verdict.passed == judge_passed else "disagree"
+        self.audits[f"{verdict.tier}:{key}"] += 1
+
+
+def split_aliases(value: object) -> list[str]:
+    """Dataset `aliases` cells are pipe-separated strings (NaN when empty)."""
+    if not isinstance(value, str):
+        return []
+    return [a.strip() for a in value.split("|") if a.strip()]
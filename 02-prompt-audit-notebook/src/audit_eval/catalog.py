@@ -0,0 +1,200 @@
+"""
+Run catalog: one indexed row per evaluation run so reports never have to open
+(let alone load) every ``run_*.sqlite`` to find what they need.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from pathlib import Path
+from typing import Iterator, Sequence
+
+OUT_DIR = Path(__file__).parents[2] / "outputs"
+CATALOG = OUT_DIR / "catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+  run_id TEXT PRIMARY KEY,
+  db_path TEXT NOT NULL,
+  model TEXT,
+  prompt_bundle TEXT,
+  dataset TEXT,
+  started REAL,
+  rows INT,
+  accuracy REAL,
+  latency_p50 REAL,
+  latency_p95 REAL,
+  cost_usd REAL,
+  db_mtime_ns INT
+);
+CREATE INDEX IF NOT EXISTS runs_model ON runs(model);
+CREATE INDEX IF NOT EXISTS runs_bundle ON runs(prompt_bundle);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs(dataset);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+"""
+
+RUN_COLUMNS = (
+    "run_id",
+    "model",
+    "prompt_bundle",
+    "dataset",
+    "started",
+    "rows",
+    "accuracy",
+    "latency_p50",
+    "latency_p95",
+    "cost_usd",
+)
+
+# Columns added after the first release; older catalogs are migrated on open
+_RUNS_ADDED = (("db_mtime_ns", "INT"),)
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or CATALOG
+    path.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    have = {r[1] for r in conn.execute("PRAGMA table_info(runs)")}
+    for col, decl in _RUNS_ADDED:
+        if col not in have:
+            conn.execute(f"ALTER TABLE runs ADD COLUMN {col} {decl}")
+    return conn
+
+
+def has_table(conn: sqlite3.Connection, name: str, schema: str = "main") -> bool:
+    return (
+        conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?",
+            (name,),
+        ).fetchone()
+        is not None
+    )
+
+
+def quantiles(
+    conn: sqlite3.Connection,
+    table: str,
+    column: str,
+    qs: Sequence[float],
+    where: str = "1",
+    params: Sequence = (),
+) -> list[float | None]:
+    """
+    Nearest-rank quantiles computed in SQL from a single ordered pass; only
+    the selected ranks are pulled into Python.
+    """
+    base = f"FROM {table} WHERE {column} IS NOT NULL AND ({where})"
+    (n,) = conn.execute(f"SELECT COUNT(*) {base}", params).fetchone()
+    if not n:
+        return [None] * len(qs)
+    ranks = [max(1, math.ceil(q * n - 1e-9)) for q in qs]
+    picked = dict(
+        conn.execute(
+            f"SELECT rn, v FROM (SELECT {column} AS v, "
+            f"ROW_NUMBER() OVER (ORDER BY {column}) AS rn {base}) "
+            f"WHERE rn IN ({', '.join('?' * len(ranks))})",
+            (*params, *ranks),
+        )
+    )
+    return [picked[r] for r in ranks]
+
+
+def _run_meta(run: sqlite3.Connection) -> dict:
+    if not has_table(run, "meta"):
+        return {}
+    return dict(run.execute("SELECT key, value FROM meta").fetchall())
+
+
+def _mtime_ns(db_path: Path) -> int:
+    """Last write to a run database, including a pending WAL file."""
+    wal = db_path.with_name(db_path.name + "-wal")
+    return max(p.stat().st_mtime_ns for p in (db_path, wal) if p.exists())
+
+
+def index_run(db_path: Path, catalog: sqlite3.Connection | None = None) -> None:
+    """(Re)compute one run's aggregates with SQL and upsert its catalog row."""
+    catalog = catalog or connect()
+    mtime_ns = _mtime_ns(db_path)
+    run = sqlite3.connect(db_path)
+    try:
+        meta = _run_meta(run)
+        if has_table(run, "eval"):
+            rows, accuracy, cost = run.execute(
+                "SELECT COUNT(*), AVG(passed), SUM(cost_usd) FROM eval"
+            ).fetchone()
+            p50, p95 = quantiles(run, "eval", "latency", (0.50, 0.95))
+        else:
+            rows, accuracy, cost, p50, p95 = 0, None, None, None, None
+    finally:
+        run.close()
+    catalog.execute(
+        f"INSERT OR REPLACE INTO runs (db_path, {', '.join(RUN_COLUMNS)}, "
+        f"db_mtime_ns) VALUES ({', '.join('?' * (len(RUN_COLUMNS) + 2))})",
+        (
+            str(db_path),
+            db_path.stem,
+            meta.get("model"),
+            meta.get("prompt_bundle"),
+            meta.get("dataset"),
+            float(meta.get("started") or db_path.stat().st_mtime),
+            rows,
+            accuracy,
+            p50,
+            p95,
+            cost,
+            mtime_ns,
+        ),
+    )
+    catalog.commit()
+
+
+def sync(catalog: sqlite3.Connection | None = None) -> int:
+    """
+    Index run databases that are new or were written to (resumed, extended)
+    since they were last indexed; returns the count.
+    """
+    catalog = catalog or connect()
+    known = dict(catalog.execute("SELECT db_path, db_mtime_ns FROM runs"))
+    stale = [
+        p
+        for p in sorted(OUT_DIR.glob("run_*.sqlite"))
+        if known.get(str(p)) != _mtime_ns(p)
+    ]
+    for db_path in stale:
+        index_run(db_path, catalog)
+    return len(stale)
+
+
+def list_runs(
+    catalog: sqlite3.Connection,
+    model: str | None = None,
+    dataset: str | None = None,
+    prompt_bundle: str | None = None,
+    limit: int = 20,
+) -> Iterator[sqlite3.Row]:
+    clauses, params = ["rows > 0"], []
+    for col, value in (
+        ("model", model),
+        ("dataset", dataset),
+        ("prompt_bundle", prompt_bundle),
+    ):
+        if value is not None:
+            clauses.append(f"{col} = ?")
+            params.append(value)
+    yield from catalog.execute(
+        f"SELECT * FROM runs WHERE {' AND '.join(clauses)} "
+        "ORDER BY started DESC LIMIT ?",
+        (*params, limit),
+    )
+
+
+def get_run(catalog: sqlite3.Connection, run_id: str | None = None):
+    """A catalog row by id, or the newest non-empty run when `run_id` is None."""
+    if run_id is None:
+        return catalog.execute(
+            "SELECT * FROM runs WHERE rows > 0 ORDER BY started DESC LIMIT 1"
+        ).fetchone()
+    return catalog.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
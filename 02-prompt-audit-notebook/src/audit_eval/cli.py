@@ -1,27 +1,201 @@
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+import audit_eval.catalog as cat
 import audit_eval.dataset as ds
 import audit_eval.grader as gr
 import typer
+from prompt_audit.client import CFG
+from prompt_audit.templating import bundle_id
 
 app = typer.Typer()
 
 
+async def _grade_all(rows, concurrency: int, checkpoint_every: int) -> int:
+    """
+    Grade a row stream with `concurrency` workers pulling from one shared
+    iterator, so only in-flight rows are held in memory; the shared rate
+    limiter paces the requests.
+    """
+    done = passed = 0
+
+    async def worker() -> None:
+        nonlocal done, passed
+        for q, ref, aliases, key in rows:
+            passed += await gr.agrade_row(q, ref, aliases=aliases, row_key=key)
+            done += 1
+            if checkpoint_every and done % checkpoint_every == 0:
+                gr.checkpoint()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return passed
+
+
+def _not_done(rows, done: Counter):
+    """Skip as many occurrences of each row key as the run already graded."""
+    for row in rows:
+        if done[row[3]] > 0:
+            done[row[3]] -= 1
+        else:
+            yield row
+
+
+_DATA_HELP = "CSV, JSONL or Parquet file (default: eval_data/queries.csv)."
+
+
+@app.command()
+def run(
+    sample: float = typer.Option(
+        1.0, help="Fraction of rows, chosen by a stable hash of each row."
+    ),
+    concurrency: int = 8,
+    audit_rate: float = typer.Option(
+        0.0, help="Fraction of local verdicts also sent to the judge."
+    ),
+    seed: int = typer.Option(42, help="Sampling seed (stored for --resume)."),
+    resume: str = typer.Option(
+        None, help="Run id to continue; rows it already graded are skipped."
+    ),
+    checkpoint_every: int = typer.Option(
+        100, help="Record progress and cost every N rows (0 = only at the end)."
+    ),
+    data: Path = typer.Option(None, exists=True, help=_DATA_HELP),
+):
+    if resume:
+        try:
+            gr.open_run(resume)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc), param_hint="--resume") from exc
+        meta = gr.run_meta()
+        sample = float(meta.get("sample", sample))
+        seed = int(meta.get("seed", seed))
+        if data is None and meta.get("data"):
+            data = Path(meta["data"])
+    data = data or ds.CSV
+    fingerprint = ds.fingerprint(data)
+    if resume:
+        current = {
+            "dataset": fingerprint,
+            "model": CFG.openai_model,
+            "prompt_bundle": bundle_id(),
+        }
+        for key, value in current.items():
+            if meta.get(key) not in (None, value):
+                typer.echo(
+                    f"❌  {key} {value} is not what run {resume} started with "
+                    f"({meta[key]}); start a new run instead.",
+                    err=True,
+                )
+                raise typer.Exit(code=1)
+    gr.CASCADE.audit_rate = audit_rate
+    gr.annotate_run(dataset=fingerprint, data=str(data), sample=sample, seed=seed)
+    done = gr.done_keys()
+    typer.echo(
+        f"Run {gr.run_path().stem}: grading a {sample:.0%} sample of {data.name}"
+        + (f" ({sum(done.values())} rows already done)" if resume else "")
+    )
+    rows = _not_done(ds.iter_rows(data, sample, seed), done)
+    asyncio.run(_grade_all(rows, max(1, concurrency), checkpoint_every))
+    graded, passed, cost = gr.checkpoint()
+    cat.index_run(gr.run_path())
+    if not graded:
+        typer.echo("⚠️  No rows selected — add data or use --sample 1.")
+        raise typer.Exit(code=1)
+    accuracy = passed / graded
+    typer.echo(f"Finished {graded} samples — accuracy {accuracy:.1%}, cost ${cost:.4f}")
+    hits = ", ".join(f"{k}={v}" for k, v in gr.CASCADE.hits.most_common())
+    typer.echo(f"Grader tiers: {hits}")
+    if gr.CASCADE.audits:
+        audits = ", ".join(f"{k}={v}" for k, v in sorted(gr.CASCADE.audits.items()))
+        typer.echo(f"Judge audits: {audits}")
+
+
 @app.command()
-def run(sample: float = 1.0):
-    data = ds.load(sample)
-    if data.empty:  # extra safety net
+def matrix(
+    model: list[str] = typer.Option(
+        None, "--model", help="Model to evaluate; repeat for several."
+    ),
+    variants: Path = typer.Option(
+        None, exists=True, help="YAML: variant name → persona/format/context."
+    ),
+    judge_model: str = typer.Option(None, help="Judge for every cell."),
+    sample: float = 1.0,
+    seed: int = 42,
+    concurrency: int = 16,
+    budget_usd: float = typer.Option(
+        None, help="Stop starting new work once this much has been spent."
+    ),
+    data: Path = typer.Option(None, exists=True, help=_DATA_HELP),
+):
+    """Evaluate every model × prompt-variant cell in one pass over the data."""
+    from audit_eval import matrix as mx  # lazy import
+    from audit_eval import report as rep
+    from prompt_audit.client import CFG
+
+    try:
+        variant_map = mx.load_variants(variants)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--variants") from exc
+    data = data or ds.CSV
+    result = mx.run_matrix(
+        ds.iter_rows(data, sample, seed),
+        model or [CFG.openai_model],
+        variant_map,
+        judge_model=judge_model,
+        concurrency=concurrency,
+        budget_usd=budget_usd,
+        meta={
+            "dataset": ds.fingerprint(data),
+            "data": str(data),
+            "sample": sample,
+            "seed": seed,
+            "judge_model": judge_model or CFG.openai_model,
+        },
+    )
+    if not any(cell.rows for cell in result.cells):
         typer.echo("⚠️  No rows selected — add data or use --sample 1.")
         raise typer.Exit(code=1)
-    passed = sum(
-        gr.grade_row(q, ref) for q, ref in zip(data["question"], data["ground_truth"])
+    conn = cat.connect()
+    rep.render_runs([cat.get_run(conn, cell.run_id) for cell in result.cells])
+    typer.echo(
+        f"{result.requests} requests sent, {result.shared} shared between cells, "
+        f"≈${result.spent_usd:.4f} spent"
+        + (" — budget reached, matrix incomplete" if result.stopped_early else "")
     )
-    accuracy = passed / len(data)
-    typer.echo(f"Finished {len(data)} samples — accuracy {accuracy:.1%}")
 
 
 @app.command()
-def report():
-    """Render a rich/markdown report for the most recent run."""
+def report(
+    run_id: str = typer.Argument(None, help="Run to show (default: newest)."),
+    limit: int = typer.Option(50, help="Rows to print; the Markdown has all."),
+):
+    """Render a rich/markdown report for one run (the most recent by default)."""
     from audit_eval import report as rep  # lazy import
 
-    rep  # just importing executes the script body
-    typer.echo("Report written to outputs/ and printed above.")
+    md_path = rep.render_run(run_id, limit=limit)
+    typer.echo(f"Report written to {md_path} and printed above.")
+
+
+@app.command()
+def runs(
+    model: str = typer.Option(None),
+    dataset: str = typer.Option(None),
+    prompt_bundle: str = typer.Option(None),
+    limit: int = 20,
+):
+    """List catalogued runs, newest first."""
+    from audit_eval import report as rep
+
+    conn = cat.connect()
+    cat.sync(conn)
+    rep.render_runs(cat.list_runs(conn, model, dataset, prompt_bundle, limit))
+
+
+@app.command()
+def diff(run_a: str, run_b: str):
+    """Per-question regressions and fixes between two runs (exit 1 on regressions)."""
+    from audit_eval import report as rep
+
+    if rep.render_diff(run_a, run_b):
+        raise typer.Exit(code=1)
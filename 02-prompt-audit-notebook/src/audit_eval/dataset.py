@@ -1,14 +1,145 @@
-import math
+import hashlib
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
+from audit_eval.cascade import split_aliases
 
 CSV = Path(__file__).parents[2] / "eval_data" / "queries.csv"
+COLUMNS = ("question", "ground_truth", "aliases")
+BATCH_SIZE = 10_000
 
 
-def load(split: float = 1.0, random_state: int = 42) -> pd.DataFrame:
-    df = pd.read_csv(CSV)
-    if 0 < split < 1:
-        n = max(1, math.ceil(len(df) * split))  # ← ensures at least one row
-        df = df.sample(n=n, random_state=random_state)
-    return df.reset_index(drop=True)
+def row_key(question: str, reference: str) -> str:
+    """Stable id of a dataset row, independent of its position or sample."""
+    return hashlib.sha1(f"{question}\x1f{reference}".encode()).hexdigest()[:16]
+
+
+def _draw(key: str, seed: int) -> int:
+    digest = hashlib.sha1(f"{seed}\x1f{key}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def in_sample(key: str, fraction: float, seed: int = 42) -> bool:
+    """
+    Deterministic Bernoulli draw on the row key: a row's membership depends
+    only on (key, seed), so a sample stays the same as the file grows and a
+    larger fraction is a superset of a smaller one.
+    """
+    if not 0 < fraction < 1:
+        return True
+    return _draw(key, seed) < fraction * 2**64
+
+
+def _as_text(batch: pd.DataFrame) -> pd.DataFrame:
+    """Dataset columns as str (JSON/Parquet may store e.g. numeric references)."""
+    return batch.assign(
+        **{
+            col: batch[col].map(
+                lambda v: v if isinstance(v, str) or pd.isna(v) else str(v)
+            )
+            for col in COLUMNS
+            if col in batch
+        }
+    )
+
+
+def read_batches(
+    path: Path | None = None, batch_size: int = BATCH_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield DataFrame batches of a CSV, JSONL or Parquet file (dataset columns
+    only, values as str).
+    """
+    for batch in _read_raw(path, batch_size):
+        yield _as_text(batch)
+
+
+def _read_raw(path: Path | None, batch_size: int) -> Iterator[pd.DataFrame]:
+    path = Path(path or CSV)
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        yield from pd.read_csv(
+            path, chunksize=batch_size, dtype=str, usecols=lambda c: c in COLUMNS
+        )
+    elif ext in {".jsonl", ".ndjson"}:
+        for batch in pd.read_json(path, lines=True, chunksize=batch_size, dtype=False):
+            yield batch[[c for c in COLUMNS if c in batch]]
+    elif ext in {".parquet", ".pq"}:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:  # optional dependency
+            raise RuntimeError(
+                "Reading Parquet needs pyarrow: pip install pyarrow"
+            ) from exc
+        pf = pq.ParquetFile(path)
+        columns = [c for c in COLUMNS if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported dataset format: {path.name}")
+
+
+def _sampled(
+    path: Path | None, split: float, random_state: int, batch_size: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Sampled batches.  A non-empty file always yields at least one row: if no
+    row is drawn, the one closest to being sampled (smallest draw) is used.
+    """
+    fallback, fallback_draw, any_kept = None, None, False
+    for batch in read_batches(path, batch_size):
+        keys = [
+            row_key(q, ref) for q, ref in zip(batch["question"], batch["ground_truth"])
+        ]
+        batch = batch.assign(row_key=keys)
+        keep = [in_sample(k, split, random_state) for k in keys]
+        if any(keep):
+            any_kept = True
+            yield batch[keep]
+        elif not any_kept and keys:
+            draws = [_draw(k, random_state) for k in keys]
+            i = min(range(len(draws)), key=draws.__getitem__)
+            if fallback_draw is None or draws[i] < fallback_draw:
+                fallback, fallback_draw = batch.iloc[[i]], draws[i]
+    if not any_kept and fallback is not None:
+        yield fallback
+
+
+def iter_rows(
+    path: Path | None = None,
+    split: float = 1.0,
+    random_state: int = 42,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[tuple[str, str, list[str], str]]:
+    """
+    Stream ``(question, reference, aliases, row_key)`` for the sampled rows,
+    reading `batch_size` rows at a time; nothing is materialised beyond one
+    batch.
+    """
+    for batch in _sampled(path, split, random_state, batch_size):
+        aliases = batch["aliases"] if "aliases" in batch else [None] * len(batch)
+        for q, ref, alias, key in zip(
+            batch["question"], batch["ground_truth"], aliases, batch["row_key"]
+        ):
+            yield q, ref, split_aliases(alias), key
+
+
+def load(
+    split: float = 1.0, random_state: int = 42, path: Path | None = None
+) -> pd.DataFrame:
+    """The same hash-based sample as a DataFrame (notebooks, small sets)."""
+    batches = list(_sampled(path, split, random_state, BATCH_SIZE))
+    if not batches:
+        return pd.DataFrame(columns=[*COLUMNS[:2], "row_key"])
+    return pd.concat(batches, ignore_index=True)
+
+
+def fingerprint(path: Path | None = None) -> str:
+    """``<file name>@<content hash>`` so runs on different data never mix."""
+    path = Path(path or CSV)
+    digest = hashlib.sha1()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return f"{path.name}@{digest.hexdigest()[:12]}"
@@ -3,44 +3,200 @@ from __future__ import annotations
 import sqlite3
 import time
 import uuid
+from collections import Counter
 from pathlib import Path
+from typing import Sequence
 
-from prompt_audit.client import run_prompt
-from prompt_audit.templating import build_messages
+import audit_eval.dataset as ds
+from audit_eval.cascade import Cascade, Verdict
+from audit_eval.catalog import OUT_DIR as _OUT_DIR
+from prompt_audit.client import CFG, arun_prompt, run_prompt
+from prompt_audit.pricing import call_cost
+from prompt_audit.templating import build_messages, bundle_id
 
 # --------------------------------------------------------------------------- #
 # Lazy, per-process SQLite connection
 # --------------------------------------------------------------------------- #
-_OUT_DIR = Path(__file__).parents[2] / "outputs"
 _OUT_DIR.mkdir(exist_ok=True)
 
 
-def _get_conn() -> sqlite3.Connection:
+# Columns added after the first release; older run files are migrated on open
+_EVAL_ADDED = (("tier", "TEXT"), ("audit", "TEXT"), ("row_key", "TEXT"))
+_CALLS_ADDED = (("retry_s", "REAL"),)
+
+
+def init_run_db(db_path: Path) -> sqlite3.Connection:
+    """Open (creating or migrating) a run database with the current schema."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS eval (
+          id TEXT PRIMARY KEY,
+          question TEXT,
+          reference TEXT,
+          answer TEXT,
+          judge TEXT,
+          passed INT,
+          latency REAL,
+          cost_usd REAL,
+          tier TEXT,
+          audit TEXT,
+          row_key TEXT
+        )
+        """
+    )
+    have = {r[1] for r in conn.execute("PRAGMA table_info(eval)")}
+    for col, decl in _EVAL_ADDED:
+        if col not in have:
+            conn.execute(f"ALTER TABLE eval ADD COLUMN {col} {decl}")
+    _backfill_row_keys(conn)
+    conn.execute("CREATE INDEX IF NOT EXISTS eval_row_key ON eval(row_key)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS calls (
+          id TEXT PRIMARY KEY,
+          eval_id TEXT,
+          kind TEXT,
+          model TEXT,
+          prompt_tokens INT,
+          completion_tokens INT,
+          retries INT,
+          queue_s REAL,
+          retry_s REAL,
+          ttft_s REAL,
+          latency_s REAL,
+          itl_p50_s REAL,
+          itl_p95_s REAL,
+          itl_max_s REAL,
+          tokens_per_s REAL
+        )
+        """
+    )
+    have = {r[1] for r in conn.execute("PRAGMA table_info(calls)")}
+    for col, decl in _CALLS_ADDED:
+        if col not in have:
+            conn.execute(f"ALTER TABLE calls ADD COLUMN {col} {decl}")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+          ts REAL,
+          rows INT,
+          passed INT,
+          cost_usd REAL
+        )
+        """
+    )
+    conn.commit()
+    return conn
+
+
+def open_run(run_id: str | None = None) -> Path:
     """
-    Create (once per Python process) a SQLite database named run_<epoch>.sqlite
-    and cache the connection for the remainder of the process.
+    Open this process's run database: a new run_<epoch>.sqlite, or the
+    existing `run_id` when resuming.  The connection is cached for the
+    remainder of the process.
     """
-    if not hasattr(_get_conn, "_conn"):
+    if run_id is None:
         db_path = _OUT_DIR / f"run_{int(time.time())}.sqlite"
-        conn = sqlite3.connect(db_path)
+    else:
+        if run_id in ("", ".", "..") or Path(run_id).name != run_id or "\\" in run_id:
+            raise ValueError(f"Invalid run id {run_id!r}: expected a bare name")
+        db_path = _OUT_DIR / f"{run_id}.sqlite"
+        if not db_path.exists():
+            raise FileNotFoundError(f"No run database {db_path}")
+    conn = init_run_db(db_path)
+    _get_conn._conn = conn
+    _get_conn._path = db_path
+    _get_conn._progress = list(
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS eval (
-              id TEXT PRIMARY KEY,
-              question TEXT,
-              reference TEXT,
-              answer TEXT,
-              judge TEXT,
-              passed INT,
-              latency REAL,
-              cost_usd REAL
-            )
-            """
+            "SELECT COUNT(*), COALESCE(SUM(passed), 0), COALESCE(SUM(cost_usd), 0) "
+            "FROM eval"
+        ).fetchone()
+    )
+    if run_id is None:
+        annotate_db(
+            conn, model=CFG.openai_model, prompt_bundle=bundle_id(), started=time.time()
         )
-        _get_conn._conn = conn
+    return db_path
+
+
+def _backfill_row_keys(conn: sqlite3.Connection) -> None:
+    missing = conn.execute(
+        "SELECT id, question, reference FROM eval WHERE row_key IS NULL"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE eval SET row_key = ? WHERE id = ?",
+        [(ds.row_key(q, ref), id_) for id_, q, ref in missing],
+    )
+    conn.commit()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Cached connection to the current run (a new run unless one was opened)."""
+    if not hasattr(_get_conn, "_conn"):
+        open_run()
     return _get_conn._conn
 
 
+def close_run() -> None:
+    """Close this process's run database; the next grade starts a new run."""
+    conn = getattr(_get_conn, "_conn", None)
+    if conn is not None:
+        conn.close()
+    for attr in ("_conn", "_path", "_progress"):
+        if hasattr(_get_conn, attr):
+            delattr(_get_conn, attr)
+
+
+def run_path() -> Path:
+    """Path of this process's run database (created on first use)."""
+    _get_conn()
+    return _get_conn._path
+
+
+def annotate_db(conn: sqlite3.Connection, **values) -> None:
+    """Store run-level metadata (model, dataset, …) that the catalog indexes."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values.items()
+    )
+    conn.commit()
+
+
+def annotate_run(**values) -> None:
+    annotate_db(_get_conn(), **values)
+
+
+def run_meta() -> dict:
+    return dict(_get_conn().execute("SELECT key, value FROM meta").fetchall())
+
+
+def done_keys() -> Counter:
+    """
+    How often each row key was graded in this run; `--resume` skips that many
+    occurrences, so repeated (question, reference) rows are still graded.
+    """
+    return Counter(k for (k,) in _get_conn().execute("SELECT row_key FROM eval"))
+
+
+def progress() -> tuple[int, int, float]:
+    """(rows graded, rows passed, cumulative cost) kept in memory, no table scan."""
+    _get_conn()
+    rows, passed, cost = _get_conn._progress
+    return rows, passed, cost
+
+
+def checkpoint() -> tuple[int, int, float]:
+    """Append the current progress and cumulative cost to `checkpoints`."""
+    conn = _get_conn()
+    rows, passed, cost = progress()
+    conn.execute(
+        "INSERT INTO checkpoints VALUES (?, ?, ?, ?)", (time.time(), rows, passed, cost)
+    )
+    conn.commit()
+    return rows, passed, cost
+
+
 # --------------------------------------------------------------------------- #
 # Single-row grader
 # --------------------------------------------------------------------------- #
@@ -51,51 +207,226 @@ You are a strict grader but may allow brief additional context.
 Reply with exactly PASS or FAIL.
 """.strip()
 
+# Local tiers tried before the judge; swap in `Cascade(tiers=…, audit_rate=…)`
+CASCADE = Cascade()
+
+
+def _judge_messages(question: str, reference: str, answer: str) -> list[dict]:
+    return [
+        {"role": "system", "content": _RUBRIC},
+        {
+            "role": "user",
+            "content": (
+                f"Q: {question}\n" f"Reference: {reference}\n" f"Answer: {answer}"
+            ),
+        },
+    ]
+
+
+_CALL_FIELDS = (
+    "id",
+    "model",
+    "prompt_tokens",
+    "completion_tokens",
+    "retries",
+    "queue_s",
+    "retry_s",
+    "ttft_s",
+    "latency_s",
+    "itl_p50_s",
+    "itl_p95_s",
+    "itl_max_s",
+    "tokens_per_s",
+)
 
-def grade_row(question: str, reference: str, temperature: float = 0.0) -> bool:
+
+def insert_row(
+    conn: sqlite3.Connection,
+    question: str,
+    reference: str,
+    answer: str,
+    verdict: str,
+    passed: bool,
+    latency: float,
+    calls: dict[str, dict],
+    tier: str,
+    audit: str | None = None,
+    row_key: str | None = None,
+) -> float:
     """
-    Ask the main model to answer `question`, then ask an LLM judge (GPT-4-o) to
-    evaluate.  Returns True (PASS) or False (FAIL) and logs the result.
+    Persist a graded row plus one `calls` row per LLM request it made into
+    `conn`; returns the row's cost (list price of the tokens it was billed).
     """
-    conn = _get_conn()
+    cost = sum(call_cost(meta) for meta in calls.values())
+
+    eval_id = str(uuid.uuid4())
+    with conn:  # the row and its calls are stored together or not at all
+        conn.execute(
+            "INSERT INTO eval (id, question, reference, answer, judge, passed, "
+            "latency, cost_usd, tier, audit, row_key) "
+            "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+            (
+                eval_id,
+                question,
+                reference,
+                answer,
+                verdict,
+                int(passed),
+                latency,
+                cost,
+                tier,
+                audit,
+                row_key or ds.row_key(question, reference),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO calls (eval_id, kind, "
+            + ", ".join(_CALL_FIELDS)
+            + ") VALUES (?, ?"
+            + ", ?" * len(_CALL_FIELDS)
+            + ")",
+            [
+                (eval_id, kind, *(meta.get(f) for f in _CALL_FIELDS))
+                for kind, meta in calls.items()
+            ],
+        )
+    return cost
+
+
+def _record(
+    question: str,
+    reference: str,
+    answer: str,
+    verdict: str,
+    passed: bool,
+    latency: float,
+    calls: dict[str, dict],
+    tier: str,
+    audit: str | None = None,
+    row_key: str | None = None,
+) -> None:
+    """`insert_row` into this process's run, keeping the progress totals."""
+    cost = insert_row(
+        _get_conn(),
+        question,
+        reference,
+        answer,
+        verdict,
+        passed,
+        latency,
+        calls,
+        tier,
+        audit,
+        row_key,
+    )
+    totals = _get_conn._progress
+    totals[0] += 1
+    totals[1] += int(passed)
+    totals[2] += cost
+
+
+def _describe(local: Verdict) -> str:
+    label = "PASS" if local.passed else "FAIL"
+    return f"{label} ({local.tier} tier, confidence {local.confidence:.2f})"
 
+
+def _judge_passed(verdict: str) -> bool:
+    return verdict.upper().startswith("PASS")
+
+
+def grade_row(
+    question: str,
+    reference: str,
+    temperature: float = 0.0,
+    aliases: Sequence[str] = (),
+    row_key: str | None = None,
+) -> bool:
+    """
+    Ask the main model to answer `question`, grade it with the local cascade
+    and fall back to an LLM judge (GPT-4-o) only for ambiguous rows.  Returns
+    True (PASS) or False (FAIL) and logs the result.
+    """
     # 1) Get model answer
     start = time.time()
-    answer = run_prompt(build_messages(question), temperature=temperature)
+    answer, answer_meta = run_prompt(
+        build_messages(question), temperature=temperature, return_meta=True
+    )
     latency = time.time() - start
+    calls = {"answer": answer_meta}
 
-    # 2) Cheap exact-string shortcut (saves cost if obvious match)
-    if reference.lower() in answer.lower():
-        passed = True
-        verdict = "PASS (exact match shortcut)"
+    # 2) Cheap local tiers (exact, alias, normalized, numeric, date, fuzzy)
+    local = CASCADE.grade(reference, answer, aliases)
+    audit = None
+    if local is None or CASCADE.should_audit():
+        judge_msg = _judge_messages(question, reference, answer)
+        judged, calls["judge"] = run_prompt(judge_msg, temperature=0, return_meta=True)
+        judged = judged.strip()
+
+    if local is None:
+        tier, verdict, passed = "judge", judged, _judge_passed(judged)
     else:
-        judge_msg = [
-            {"role": "system", "content": _RUBRIC},
-            {
-                "role": "user",
-                "content": (
-                    f"Q: {question}\n" f"Reference: {reference}\n" f"Answer: {answer}"
-                ),
-            },
-        ]
-        verdict = run_prompt(judge_msg, temperature=0).strip()
-        passed = verdict.upper().startswith("PASS")
-
-    # 3) Naïve cost placeholder (replace with usage.metadata if desired)
-    cost = 0.000_002 * len(answer.split())
+        tier, verdict, passed = local.tier, _describe(local), local.passed
+        if "judge" in calls:  # sampled audit of a local verdict
+            audit = judged
+            CASCADE.record_audit(local, _judge_passed(judged))
 
-    conn.execute(
-        "INSERT INTO eval VALUES (?,?,?,?,?,?,?,?)",
-        (
-            str(uuid.uuid4()),
-            question,
-            reference,
-            answer,
-            verdict,
-            int(passed),
-            latency,
-            cost,
-        ),
+    _record(
+        question,
+        reference,
+        answer,
+        verdict,
+        passed,
+        latency,
+        calls,
+        tier,
+        audit,
+        row_key,
+    )
+    return passed
+
+
+async def agrade_row(
+    question: str,
+    reference: str,
+    temperature: float = 0.0,
+    aliases: Sequence[str] = (),
+    row_key: str | None = None,
+) -> bool:
+    """Async `grade_row`; many rows share one connection pool and rate limiter."""
+    start = time.time()
+    answer, answer_meta = await arun_prompt(
+        build_messages(question), temperature=temperature, return_meta=True
+    )
+    latency = time.time() - start
+    calls = {"answer": answer_meta}
+
+    local = CASCADE.grade(reference, answer, aliases)
+    audit = None
+    if local is None or CASCADE.should_audit():
+        judge_msg = _judge_messages(question, reference, answer)
+        judged, calls["judge"] = await arun_prompt(
+            judge_msg, temperature=0, return_meta=True
+        )
+        judged = judged.strip()
+
+    if local is None:
+        tier, verdict, passed = "judge", judged, _judge_passed(judged)
+    else:
+        tier, verdict, passed = local.tier, _describe(local), local.passed
+        if "judge" in calls:
+            audit = judged
+            CASCADE.record_audit(local, _judge_passed(judged))
+
+    _record(
+        question,
+        reference,
+        answer,
+        verdict,
+        passed,
+        latency,
+        calls,
+        tier,
+        audit,
+        row_key,
     )
-    conn.commit()
     return passed
@@ -0,0 +1,270 @@
+"""
+Model × prompt-variant experiment matrix.
+
+Every cell is graded in one pass over the dataset, under a single concurrency
+limit and cost budget.  Prompts are rendered once per (row, variant) and
+byte-identical deterministic requests (temperature 0) are sent once and
+shared across the whole matrix (e.g. a variant that renders the same
+messages, a judge call on an identical answer, or a repeated question); the
+most recent `_SHARE_WINDOW` distinct requests are remembered.  Each cell is
+written to its own run database and indexed in the run catalog, also when
+the matrix is interrupted by an error.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+import audit_eval.grader as gr
+import yaml
+from audit_eval import catalog as cat
+from audit_eval.cascade import Cascade
+from prompt_audit.client import CFG, arun_prompt
+from prompt_audit.metrics import record_cache_hit
+from prompt_audit.pricing import call_cost
+from prompt_audit.templating import build_messages, bundle_id
+from prompt_audit.utils import request_hash
+
+DEFAULT_VARIANTS: dict[str, dict] = {"default": {}}
+_VARIANT_KEYS = {"context", "persona", "format"}
+_SHARE_WINDOW = 10_000  # distinct requests remembered for sharing
+
+
+def load_variants(path: Path | None) -> dict[str, dict]:
+    """YAML mapping of variant name → `build_messages` keyword arguments."""
+    if path is None:
+        return dict(DEFAULT_VARIANTS)
+    variants = yaml.safe_load(path.read_text()) or {}
+    for name, params in variants.items():
+        unknown = set(params or {}) - _VARIANT_KEYS
+        if unknown:
+            raise ValueError(f"Variant {name!r}: unknown keys {sorted(unknown)}")
+    return {str(name): dict(params or {}) for name, params in variants.items()}
+
+
+@dataclass
+class Cell:
+    model: str
+    variant: str
+    db_path: Path
+    conn: sqlite3.Connection
+    rows: int = 0
+    passed: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def run_id(self) -> str:
+        return self.db_path.stem
+
+
+@dataclass
+class MatrixResult:
+    cells: list[Cell]
+    requests: int = 0  # sent upstream
+    shared: int = 0  # served from another cell's identical request
+    spent_usd: float = 0.0
+    stopped_early: bool = False
+    cascade: Cascade = field(default_factory=Cascade)
+
+
+@dataclass
+class _Row:
+    question: str
+    reference: str
+    aliases: Sequence[str]
+    key: str
+    messages: dict[str, list[dict]]  # variant → rendered messages
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.]+", "-", text).strip("-")
+
+
+def _open_cells(
+    models: Sequence[str], variants: dict[str, dict], meta: dict
+) -> list[Cell]:
+    stamp = int(time.time())
+    bundle = bundle_id()
+    cells = []
+    for model in models:
+        for variant in variants:
+            db_path = (
+                gr._OUT_DIR / f"run_{stamp}_{_slug(model)}_{_slug(variant)}.sqlite"
+            )
+            conn = gr.init_run_db(db_path)
+            gr.annotate_db(
+                conn,
+                model=model,
+                prompt_bundle=f"{bundle}:{variant}",
+                matrix=stamp,
+                started=time.time(),
+                **meta,
+            )
+            cells.append(Cell(model, variant, db_path, conn))
+    return cells
+
+
+class _Runner:
+    def __init__(
+        self,
+        result: MatrixResult,
+        judge_model: str,
+        budget_usd: float | None,
+        temperature: float,
+    ):
+        self.result = result
+        self.judge_model = judge_model
+        self.budget_usd = budget_usd
+        self.temperature = temperature
+        self.sent: OrderedDict[str, asyncio.Task] = OrderedDict()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.budget_usd is not None and self.result.spent_usd >= self.budget_usd
+
+    async def _send(
+        self, messages: list[dict], model: str, params: dict
+    ) -> tuple[str, dict]:
+        self.result.requests += 1
+        text, meta = await arun_prompt(
+            messages, model=model, return_meta=True, **params
+        )
+        self.result.spent_usd += call_cost(meta)
+        return text, meta
+
+    async def request(
+        self, messages: list[dict], model: str, **params
+    ) -> tuple[str, dict]:
+        """
+        One upstream call per distinct deterministic request, shared by every
+        cell that issues it; sharers get their own call id and meta marked
+        ``coalesced`` (no cost) pointing at the ``leader_id`` that paid.
+        """
+        if params.get("temperature"):
+            return await self._send(messages, model, params)  # independent samples
+        key = request_hash(model, messages, **params)
+        task = self.sent.get(key)
+        if task is not None:
+            self.sent.move_to_end(key)
+            self.result.shared += 1
+            record_cache_hit("matrix")
+            text, meta = await task
+            return text, {
+                **meta,
+                "id": str(uuid.uuid4()),
+                "coalesced": True,
+                "leader_id": meta["id"],
+            }
+        task = self.sent[key] = asyncio.ensure_future(
+            self._send(messages, model, params)
+        )
+        if len(self.sent) > _SHARE_WINDOW:
+            self.sent.popitem(last=False)
+        try:
+            return await task
+        except Exception:
+            if self.sent.get(key) is task:
+                del self.sent[key]  # let a later cell retry the request
+            raise
+
+    async def grade(self, row: _Row, cell: Cell) -> None:
+        start = time.time()
+        answer, answer_meta = await self.request(
+            row.messages[cell.variant],
+            model=cell.model,
+            temperature=self.temperature,
+        )
+        latency = time.time() - start
+        calls = {"answer": answer_meta}
+
+        local = self.result.cascade.grade(row.reference, answer, row.aliases)
+        if local is None:
+            verdict, calls["judge"] = await self.request(
+                gr._judge_messages(row.question, row.reference, answer),
+                model=self.judge_model,
+                temperature=0,
+            )
+            verdict = verdict.strip()
+            tier, passed = "judge", gr._judge_passed(verdict)
+        else:
+            tier, verdict, passed = local.tier, gr._describe(local), local.passed
+
+        cost = gr.insert_row(
+            cell.conn,
+            row.question,
+            row.reference,
+            answer,
+            verdict,
+            passed,
+            latency,
+            calls,
+            tier,
+            row_key=row.key,
+        )
+        cell.rows += 1
+        cell.passed += int(passed)
+        cell.cost_usd += cost
+
+
+def _work(
+    rows: Iterable[tuple], variants: dict[str, dict], cells: list[Cell]
+) -> Iterator[tuple[_Row, Cell]]:
+    """Row-major (row, cell) items so a row's cells run close together."""
+    for question, reference, aliases, key in rows:
+        messages = {name: build_messages(question, **v) for name, v in variants.items()}
+        row = _Row(question, reference, aliases, key, messages)
+        for cell in cells:
+            yield row, cell
+
+
+async def _drive(runner: _Runner, items: Iterator, concurrency: int) -> None:
+    async def worker() -> None:
+        for row, cell in items:  # shared iterator: each item is taken once
+            if runner.exhausted:
+                runner.result.stopped_early = True
+                return
+            await runner.grade(row, cell)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def run_matrix(
+    rows: Iterable[tuple],
+    models: Sequence[str],
+    variants: dict[str, dict],
+    judge_model: str | None = None,
+    concurrency: int = 16,
+    budget_usd: float | None = None,
+    temperature: float = 0.0,
+    meta: dict | None = None,
+) -> MatrixResult:
+    """
+    Grade `rows` — ``(question, reference, aliases, row_key)`` tuples — for
+    every model × variant cell.  Once `budget_usd` is spent no new work is
+    started; rows already in flight still finish, answer and judge call, so
+    the budget can be exceeded by at most 2 × `concurrency` calls.  Cells are checkpointed, closed and catalogued
+    even if grading fails part-way.
+    """
+    cells = _open_cells(models, variants, meta or {})
+    result = MatrixResult(cells)
+    runner = _Runner(result, judge_model or CFG.openai_model, budget_usd, temperature)
+    try:
+        asyncio.run(_drive(runner, _work(rows, variants, cells), max(1, concurrency)))
+    finally:
+        for cell in cells:
+            cell.conn.execute(
+                "INSERT INTO checkpoints VALUES (?, ?, ?, ?)",
+                (time.time(), cell.rows, cell.passed, cell.cost_usd),
+            )
+            cell.conn.commit()
+            cell.conn.close()
+            cat.index_run(cell.db_path)
+    return result
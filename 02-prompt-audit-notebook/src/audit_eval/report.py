@@ -1,38 +1,234 @@
+"""
+Catalog-backed reports.  Everything is computed with aggregate SQL against the
+run databases; row tables are streamed, never loaded whole.
+"""
+
 from __future__ import annotations
 
 import sqlite3
+import time
 from pathlib import Path
+from typing import Iterable
 
-import pandas as pd
+import audit_eval.dataset as ds
+from audit_eval import catalog as cat
 from rich.console import Console
 from rich.table import Table
 
-OUT_DIR = Path("outputs")
-candidates = sorted(OUT_DIR.glob("run_*.sqlite"), reverse=True)
+LATENCY_COLS = (
+    "queue_s",
+    "retry_s",
+    "ttft_s",
+    "itl_p50_s",
+    "itl_p95_s",
+    "latency_s",
+)
+PCTS = (0.50, 0.95, 0.99)
+_BATCH = 1_000
+
+
+def _columns(conn: sqlite3.Connection, table: str, schema: str = "main") -> set[str]:
+    return {r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+
+
+def _short(text: str | None, width: int = 80) -> str:
+    text = text or ""
+    return text[:width] + ("…" if len(text) > width else "")
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "–"
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+def _open_run(conn: sqlite3.Connection, run_id: str | None) -> sqlite3.Row:
+    row = cat.get_run(conn, run_id)
+    if row is None:
+        raise SystemExit(
+            f"❌  Run {run_id} not found in the catalog"
+            if run_id
+            else "❌  No non-empty evaluation runs found in outputs/"
+        )
+    return row
+
+
+# --------------------------------------------------------------------------- #
+# Single run
+# --------------------------------------------------------------------------- #
+def latency_summary(run: sqlite3.Connection) -> list[tuple]:
+    """(kind, pct, *LATENCY_COLS, tokens_per_s) rows, p50/p95/p99 per call kind."""
+    if not cat.has_table(run, "calls"):
+        return []  # runs recorded before per-call metrics
+    metrics = LATENCY_COLS + ("tokens_per_s",)
+    have = _columns(run, "calls")  # retry_s is missing from older runs
+    out = []
+    for (kind,) in run.execute("SELECT DISTINCT kind FROM calls ORDER BY kind"):
+        per_metric = [
+            (
+                cat.quantiles(run, "calls", m, PCTS, "kind = ?", (kind,))
+                if m in have
+                else [None] * len(PCTS)
+            )
+            for m in metrics
+        ]
+        for i, pct in enumerate(PCTS):
+            out.append((kind, f"p{round(pct * 100)}", *(v[i] for v in per_metric)))
+    return out
+
+
+def tier_summary(run: sqlite3.Connection) -> list[tuple]:
+    """(tier, rows, pass rate) for runs graded by the cascade."""
+    if "tier" not in _columns(run, "eval"):
+        return []
+    return run.execute(
+        "SELECT tier, COUNT(*), AVG(passed) FROM eval GROUP BY tier ORDER BY 2 DESC"
+    ).fetchall()
 
-# Grab the newest DB **that actually contains rows**
-for db_path in candidates:
-    df = pd.read_sql("SELECT * FROM eval", sqlite3.connect(db_path))
-    if not df.empty:
-        break
-else:
-    raise SystemExit("❌  No non-empty evaluation runs found in outputs/")
 
-accuracy = df["passed"].mean() * 100
-table = Table(title=f"Evaluation run {db_path.name} — Accuracy {accuracy:.1f}%")
+def _write_markdown(
+    run: sqlite3.Connection, md_path: Path, latency: list[tuple]
+) -> None:
+    cursor = run.execute("SELECT * FROM eval")
+    header = [d[0] for d in cursor.description]
+    with md_path.open("w", encoding="utf-8") as fh:
+        fh.write("| " + " | ".join(header) + " |\n")
+        fh.write("|" + "---|" * len(header) + "\n")
+        while batch := cursor.fetchmany(_BATCH):
+            for rec in batch:
+                cells = (str(v).replace("|", "\\|").replace("\n", " ") for v in rec)
+                fh.write("| " + " | ".join(cells) + " |\n")
+        if latency:
+            cols = ("kind", "pct") + LATENCY_COLS + ("tokens_per_s",)
+            fh.write("\n\n## Latency per call\n\n")
+            fh.write("| " + " | ".join(cols) + " |\n")
+            fh.write("|" + "---|" * len(cols) + "\n")
+            for rec in latency:
+                fh.write("| " + " | ".join(map(_fmt, rec)) + " |\n")
 
-for col in ["question", "answer", "passed"]:
-    table.add_column(col, overflow="fold")
 
-for _, row in df.iterrows():
-    table.add_row(
-        row["question"],
-        row["answer"][:80] + ("…" if len(row["answer"]) > 80 else ""),
-        "✅" if row["passed"] else "❌",
+def render_run(
+    run_id: str | None = None, limit: int = 50, console: Console | None = None
+) -> Path:
+    """Print one run (newest by default) and write its Markdown snapshot."""
+    console = console or Console()
+    conn = cat.connect()
+    cat.sync(conn)
+    info = _open_run(conn, run_id)
+    db_path = Path(info["db_path"])
+    run = sqlite3.connect(db_path)
+
+    accuracy = "n/a" if info["accuracy"] is None else f"{info['accuracy']:.1%}"
+    table = Table(
+        title=f"Evaluation run {db_path.name} — Accuracy {accuracy}",
+        caption=(
+            f"showing {limit} of {info['rows']} rows" if info["rows"] > limit else None
+        ),
     )
+    for col in ["question", "answer", "passed"]:
+        table.add_column(col, overflow="fold")
+    for question, answer, passed in run.execute(
+        "SELECT question, answer, passed FROM eval LIMIT ?", (limit,)
+    ):
+        table.add_row(question, _short(answer), "✅" if passed else "❌")
+    console.print(table)
+
+    tiers = tier_summary(run)
+    if tiers:
+        tier_table = Table(title="Grader tiers")
+        for col in ("tier", "rows", "pass rate"):
+            tier_table.add_column(col, justify="right")
+        for tier, n, rate in tiers:
+            tier_table.add_row(tier or "–", str(n), f"{rate:.1%}")
+        console.print(tier_table)
+
+    latency = latency_summary(run)
+    if latency:
+        lat_table = Table(title="Latency per call (seconds; tokens_per_s in tok/s)")
+        for col in ("kind", "pct") + LATENCY_COLS + ("tokens_per_s",):
+            lat_table.add_column(col, justify="right")
+        for rec in latency:
+            lat_table.add_row(*map(_fmt, rec))
+        console.print(lat_table)
+
+    # Write Markdown snapshot for Git history / diff
+    md_path = db_path.with_suffix(".sqlite.md")
+    _write_markdown(run, md_path, latency)
+    run.close()
+    return md_path
 
-Console().print(table)
 
-# Write Markdown snapshot for Git history / diff
-md_path = db_path.with_suffix(".sqlite.md")
-df.to_markdown(md_path, index=False)
+# --------------------------------------------------------------------------- #
+# Cross-run views
+# --------------------------------------------------------------------------- #
+def render_runs(rows: Iterable[sqlite3.Row], console: Console | None = None) -> None:
+    table = Table(title="Evaluation runs")
+    for col in cat.RUN_COLUMNS:
+        table.add_column(col, overflow="fold")
+    for row in rows:
+        cells = {c: _fmt(row[c]) for c in cat.RUN_COLUMNS}
+        cells["started"] = time.strftime(
+            "%Y-%m-%d %H:%M", time.localtime(row["started"])
+        )
+        table.add_row(*cells.values())
+    (console or Console()).print(table)
+
+
+def _keyed_eval(run: sqlite3.Connection, schema: str) -> str:
+    """
+    `schema.eval` with a row key and its occurrence number, so duplicate
+    dataset rows pair up one-to-one instead of fanning out.
+    """
+    key = "COALESCE(row_key, _row_key(question, reference))"
+    if "row_key" not in _columns(run, "eval", schema):
+        key = "_row_key(question, reference)"  # run predates row keys
+    return (
+        f"(SELECT {key} AS k, ROW_NUMBER() OVER "
+        f"(PARTITION BY {key} ORDER BY rowid) AS nth, question, reference, passed "
+        f"FROM {schema}.eval)"
+    )
+
+
+def diff_runs(run_a: str, run_b: str) -> tuple[tuple, list[tuple]]:
+    """
+    Compare two runs row-by-row (matched on the dataset row key).  Returns
+    ``((shared rows, passes in A, passes in B), changed rows)`` where each
+    changed row is ``(question, reference, passed_a, passed_b)``.
+    """
+    conn = cat.connect()
+    cat.sync(conn)
+    a, b = _open_run(conn, run_a), _open_run(conn, run_b)
+    run = sqlite3.connect(a["db_path"])
+    run.create_function("_row_key", 2, ds.row_key, deterministic=True)
+    run.execute("ATTACH DATABASE ? AS other", (b["db_path"],))
+    join = (
+        f"FROM {_keyed_eval(run, 'main')} AS a "
+        f"JOIN {_keyed_eval(run, 'other')} AS b USING (k, nth)"
+    )
+    totals = run.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(a.passed), 0), COALESCE(SUM(b.passed), 0) "
+        f"{join}"
+    ).fetchone()
+    changed = run.execute(
+        f"SELECT a.question, a.reference, a.passed, b.passed {join} "
+        "WHERE a.passed != b.passed ORDER BY b.passed, a.question"
+    ).fetchall()
+    run.close()
+    return totals, changed
+
+
+def render_diff(run_a: str, run_b: str, console: Console | None = None) -> int:
+    """Print per-question regressions/fixes; returns the number of regressions."""
+    console = console or Console()
+    (shared, pass_a, pass_b), changed = diff_runs(run_a, run_b)
+    regressions = sum(1 for *_, pa, pb in changed if pa and not pb)
+    table = Table(
+        title=f"{run_a} → {run_b}: {shared} shared rows, "
+        f"{pass_a} → {pass_b} passes, {regressions} regressions"
+    )
+    for col in ("question", "reference", "change"):
+        table.add_column(col, overflow="fold")
+    for question, reference, pa, pb in changed:
+        table.add_row(question, _short(reference), "✅→❌" if pa else "❌→✅")
+    console.print(table)
+    return regressions
@@ -6,6 +6,8 @@ import time
 import uuid
 from typing import Any, Dict
 
+from .metrics import record_call
+
 __all__ = ["run_prompt", "log_call"]
 
 
@@ -21,13 +23,19 @@ def run_prompt(client, prompt: str, **completion_kwargs) -> str:
     return response.choices[0].message.content  # type: ignore
 
 
+def _usage(response: Any, key: str) -> int | None:
+    usage = getattr(response, "usage", None) or {}
+    return usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+
+
 def log_call(prompt: str, response: Any, latency: float) -> None:
-    """Persist call metadata (stub)."""
+    """Record call metrics; the JSON log line itself is sampled."""
     meta: Dict[str, Any] = {
         "id": str(uuid.uuid4()),
+        "model": getattr(response, "model", None),
         "prompt": prompt,
         "latency_s": latency,
-        "tokens_in": getattr(response, "usage", {}).get("prompt_tokens", None),
-        "tokens_out": getattr(response, "usage", {}).get("completion_tokens", None),
+        "prompt_tokens": _usage(response, "prompt_tokens"),
+        "completion_tokens": _usage(response, "completion_tokens"),
     }
-    print("[prompt-audit]", meta)
+    record_call(meta)
@@ -1,87 +1,294 @@
 # src/prompt_audit/client.py
 from __future__ import annotations
 
-import json
 import time
 import uuid
-from typing import Iterator, List
-
-from openai import OpenAI  # >= 1.90
-from tenacity import retry, stop_after_attempt, wait_random_exponential  # type: ignore
+from typing import Any, AsyncIterator, Iterator, List
 
+from .latency import CallClock
+from .metrics import record_cache_hit, record_call, start_exporter
 from .settings import Settings
-from .utils import LOGGER, count_tokens
+from .singleflight import AsyncFlight, SingleFlight
+from .transport import (
+    RateLimiter,
+    acall_with_retry,
+    async_client,
+    build_client,
+    call_with_retry,
+    request_budget,
+)
+from .utils import count_text_tokens, count_tokens, request_hash
 
 CFG = Settings()
-client = OpenAI(api_key=CFG.openai_api_key, timeout=CFG.request_timeout)
-
-
-def _log(meta: dict) -> None:
-    LOGGER.info(json.dumps(meta, default=str))
+LIMITER = RateLimiter(CFG.rpm_limit, CFG.tpm_limit)
+client = build_client(CFG, LIMITER)
+EXPORTER = start_exporter(CFG)
+FLIGHTS = SingleFlight()
 
 
-def _meta(prompt_tokens: int) -> dict:
+def _meta(prompt_tokens: int, model: str) -> dict:
     return {
         "id": str(uuid.uuid4()),
-        "model": CFG.openai_model,
+        "model": model,
         "prompt_tokens": prompt_tokens,
+        "retries": 0,
         "ts": time.time(),
     }
 
 
-@retry(
-    wait=wait_random_exponential(multiplier=1, max=20),
-    stop=stop_after_attempt(CFG.max_retries),
-)
+def _stream_kwargs(kwargs: dict) -> dict:
+    # ask for a final usage chunk so completion_tokens are real tokens
+    return {"stream_options": {"include_usage": True}, **kwargs}
+
+
+def _finish(
+    meta: dict, clock: CallClock, completion_tokens: int, total_tokens: int
+) -> None:
+    meta.update(
+        {
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            **clock.summary(completion_tokens),
+        }
+    )
+    record_call(meta)
+
+
+def _result(text: Any, meta: dict, return_meta: bool):
+    return (text, meta) if return_meta else text
+
+
 def run_prompt(
-    messages: List[dict], stream: bool = False, **kwargs
+    messages: List[dict],
+    stream: bool = False,
+    return_meta: bool = False,
+    coalesce: bool | None = None,
+    **kwargs,
 ) -> str | Iterator[str]:
-    """High-level helper that retries on rate-limit / 5xx and logs cost."""
-    prompt_tokens = count_tokens(messages, CFG.openai_model)
-    meta = _meta(prompt_tokens)
+    """
+    High-level helper: waits for rate-limit capacity, retries transient
+    failures (429 / 5xx / connection) and logs cost and latency.
 
+    Only the request itself is retried; once a stream has started yielding,
+    errors propagate so the caller never sees duplicated output.  With
+    `return_meta=True` a ``(result, meta)`` tuple is returned; for streams
+    the timing fields are filled in once the generator is exhausted.
+    Pass `model=` to override ``Settings.openai_model`` for one call.
+
+    Concurrent byte-identical requests at ``temperature=0`` share one
+    upstream call (and stream); sampled requests are never shared unless
+    `coalesce=True` is passed, and `coalesce=False` always opts out.
+    ``meta["coalesced"]`` marks callers that did not send their own request
+    (they carry the leader's tokens but cost nothing, see
+    `pricing.call_cost`), ``meta["shared_by"]`` counts the callers served.
+    """
+    model = kwargs.pop("model", None) or CFG.openai_model
+    if not _coalescing(coalesce, kwargs):
+        text, meta = _call(messages, model, stream, kwargs)
+        return _result(text, meta, return_meta)
+
+    flight, leader = FLIGHTS.join(
+        request_hash(model, messages, stream=stream, **kwargs)
+    )
+    if leader:
+        try:
+            result, meta = _call(messages, model, stream, kwargs)
+        except BaseException as exc:
+            flight.reject(exc)
+            raise
+        meta["coalesced"] = False
+        if not stream:
+            flight.resolve(result, meta)
+            meta.update(FLIGHTS.stats(flight))
+            return _result(result, meta, return_meta)
+        flight.start_stream(result, meta)
+    else:
+        record_cache_hit("singleflight")
+        result = flight.wait()
+        meta = _follower_meta(flight.meta)
+        if not stream:
+            meta.update(FLIGHTS.stats(flight))
+            return _result(result, meta, return_meta)
+
+    def generator():
+        try:
+            yield from flight.stream()
+        finally:
+            if leader and not flight.done:
+                flight.detach()  # abandoned mid-stream
+        if meta is not flight.meta:
+            meta.update(_follower_meta(flight.meta))
+        meta.update(FLIGHTS.stats(flight))
+
+    return _result(generator(), meta, return_meta)
+
+
+def _coalescing(coalesce: bool | None, kwargs: dict) -> bool:
+    # sampled calls (the API default is temperature=1) must stay independent
+    if coalesce is None:
+        return CFG.coalesce_requests and kwargs.get("temperature", 1) == 0
+    return coalesce
+
+
+def _follower_meta(leader: dict) -> dict:
+    return {
+        **leader,
+        "id": str(uuid.uuid4()),
+        "coalesced": True,
+        "leader_id": leader["id"],
+    }
+
+
+def _call(messages: List[dict], model: str, stream: bool, kwargs: dict):
+    """One upstream request; returns ``(text or delta iterator, meta)``."""
+    prompt_tokens = count_tokens(messages, model)
+    meta = _meta(prompt_tokens, model)
+    clock = CallClock()
     if stream:
-        # stream chunks back to caller
-        chunk_iter = client.chat.completions.create(
-            model=CFG.openai_model,
+        kwargs = _stream_kwargs(kwargs)
+
+    resp = call_with_retry(
+        lambda: client.chat.completions.create(
+            model=model,
             messages=messages,
-            stream=True,
+            stream=stream,
             **kwargs,
-        )
+        ),
+        LIMITER,
+        request_budget(prompt_tokens, kwargs),
+        CFG.max_retries,
+        meta,
+    )
+    clock.mark_sent(meta["queue_s"], meta["retry_s"])
 
+    if stream:
+        # stream chunks back to caller
         def generator():
-            completion_tokens = 0
+            usage = None
             full = []
-            for chunk in chunk_iter:
+            for chunk in resp:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
                 delta = chunk.choices[0].delta.content or ""
-                completion_tokens += len(delta)
+                if delta:
+                    clock.tick()
                 full.append(delta)
                 yield delta
-            meta.update(
-                {
-                    "completion_tokens": completion_tokens,
-                    "total_tokens": prompt_tokens + completion_tokens,
-                }
+            completion_tokens = (
+                usage.completion_tokens
+                if usage is not None
+                else count_text_tokens("".join(full), model)
             )
-            _log(meta)
+            _finish(meta, clock, completion_tokens, prompt_tokens + completion_tokens)
 
-        return generator()
+        return generator(), meta
 
-    # non-stream call
-    resp = client.chat.completions.create(
-        model=CFG.openai_model,
-        messages=messages,
-        stream=False,
-        **kwargs,
+    clock.tick()
+    _finish(
+        meta, clock, resp.usage.completion_tokens, resp.usage.total_tokens
+    )  # usage always present on non-stream responses
+    return resp.choices[0].message.content, meta
+
+
+async def arun_prompt(
+    messages: List[dict],
+    stream: bool = False,
+    return_meta: bool = False,
+    coalesce: bool | None = None,
+    **kwargs,
+) -> str | AsyncIterator[str]:
+    """Async `run_prompt` on the shared keep-alive pool, for concurrent runs."""
+    model = kwargs.pop("model", None) or CFG.openai_model
+    if not _coalescing(coalesce, kwargs):
+        text, meta = await _acall(messages, model, stream, kwargs)
+        return _result(text, meta, return_meta)
+
+    flight, leader = FLIGHTS.join(
+        request_hash(model, messages, stream=stream, **kwargs), AsyncFlight
     )
-    completion_tokens = (
-        resp.usage.completion_tokens
-    )  # field always present :contentReference[oaicite:7]{index=7}
-    meta.update(
-        {
-            "completion_tokens": completion_tokens,
-            "total_tokens": resp.usage.total_tokens,
-        }
+    if leader:
+        try:
+            result, meta = await _acall(messages, model, stream, kwargs)
+        except BaseException as exc:
+            await flight.reject(exc)
+            raise
+        meta["coalesced"] = False
+        if not stream:
+            await flight.resolve(result, meta)
+            meta.update(FLIGHTS.stats(flight))
+            return _result(result, meta, return_meta)
+        await flight.start_stream(result, meta)
+    else:
+        record_cache_hit("singleflight")
+        result = await flight.wait()
+        meta = _follower_meta(flight.meta)
+        if not stream:
+            meta.update(FLIGHTS.stats(flight))
+            return _result(result, meta, return_meta)
+
+    async def generator():
+        try:
+            async for delta in flight.stream():
+                yield delta
+        finally:
+            if leader and not flight.done:
+                flight.detach()  # abandoned mid-stream
+        if meta is not flight.meta:
+            meta.update(_follower_meta(flight.meta))
+        meta.update(FLIGHTS.stats(flight))
+
+    return _result(generator(), meta, return_meta)
+
+
+async def _acall(messages: List[dict], model: str, stream: bool, kwargs: dict):
+    """Async `_call`."""
+    prompt_tokens = count_tokens(messages, model)
+    meta = _meta(prompt_tokens, model)
+    clock = CallClock()
+    aclient = async_client(CFG, LIMITER)
+    if stream:
+        kwargs = _stream_kwargs(kwargs)
+
+    resp = await acall_with_retry(
+        lambda: aclient.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=stream,
+            **kwargs,
+        ),
+        LIMITER,
+        request_budget(prompt_tokens, kwargs),
+        CFG.max_retries,
+        meta,
     )
-    _log(meta)
-    return resp.choices[0].message.content
+    clock.mark_sent(meta["queue_s"], meta["retry_s"])
+
+    if stream:
+
+        async def generator():
+            usage = None
+            full = []
+            async for chunk in resp:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    clock.tick()
+                full.append(delta)
+                yield delta
+            completion_tokens = (
+                usage.completion_tokens
+                if usage is not None
+                else count_text_tokens("".join(full), model)
+            )
+            _finish(meta, clock, completion_tokens, prompt_tokens + completion_tokens)
+
+        return generator(), meta
+
+    clock.tick()
+    _finish(meta, clock, resp.usage.completion_tokens, resp.usage.total_tokens)
+    return resp.choices[0].message.content, meta
@@ -0,0 +1,61 @@
+# src/prompt_audit/latency.py
+"""Per-call latency breakdown: queueing, time-to-first-token, inter-token gaps."""
+from __future__ import annotations
+
+import math
+import time
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float | None:
+    """Nearest-rank percentile (`q` in 0–100) of unsorted `values`."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class CallClock:
+    """
+    Timestamps for one request.  `start` is taken before the limiter, `sent`
+    when the (final) attempt goes out, and `tick` on every content chunk.
+    A non-streaming response is a single tick, so TTFT == response latency.
+    `queue_s` is the limiter wait of the final attempt only; time spent on
+    failed attempts and their backoff is reported separately as `retry_s`.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.sent = self.start
+        self.queue = self.retry = 0.0
+        self.first: float | None = None
+        self.last: float | None = None
+        self.gaps: list[float] = []
+
+    def mark_sent(self, queue_s: float, retry_s: float = 0.0) -> None:
+        self.queue, self.retry = queue_s, retry_s
+        self.sent = self.start + retry_s + queue_s
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps.append(now - self.last)
+        self.last = now
+
+    def summary(self, completion_tokens: int) -> dict:
+        end = time.perf_counter()
+        first = self.first if self.first is not None else end
+        busy = end - self.sent
+        return {
+            "queue_s": self.queue,
+            "retry_s": self.retry,
+            "ttft_s": first - self.sent,
+            "latency_s": end - self.start,
+            "itl_p50_s": percentile(self.gaps, 50),
+            "itl_p95_s": percentile(self.gaps, 95),
+            "itl_max_s": max(self.gaps, default=None),
+            "tokens_per_s": completion_tokens / busy if busy > 0 else None,
+        }
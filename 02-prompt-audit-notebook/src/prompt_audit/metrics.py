@@ -0,0 +1,339 @@
+# src/prompt_audit/metrics.py
+"""
+In-process metrics: counters and histograms updated on every call, exported
+as Prometheus text (HTTP endpoint and/or file) and as periodic NDJSON
+snapshots.  The per-call JSON log line is sampled instead of unconditional.
+"""
+from __future__ import annotations
+
+import atexit
+import bisect
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from .utils import LOGGER
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DEFAULT_LOG_SAMPLE_RATE = 0.01
+
+LabelKey = tuple[str, ...]
+
+
+def _escape(value: object) -> str:
+    """Label value escaping required by the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    """Sample value at full precision (integral values without exponent)."""
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _labels(names: Sequence[str], values: LabelKey) -> str:
+    if not names:
+        return ""
+    pairs = (f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def samples(self) -> Iterator[tuple[str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name + _labels(self.labels, key), value
+
+    def snapshot(self) -> dict:
+        return dict(self.samples())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label combination.  Buckets are stored
+    non-cumulatively (one bisect + one increment per observation) and only
+    summed up when exported.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[LabelKey, list] = {}  # key → [counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def _items(self) -> list[tuple[LabelKey, list[int], float, int]]:
+        with self._lock:
+            return [(k, list(c), s, n) for k, (c, s, n) in self._series.items()]
+
+    def samples(self) -> Iterator[tuple[str, float]]:
+        for key, counts, total, n in self._items():
+            running = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                running += c
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield self.name + "_bucket" + _labels(
+                    self.labels + ("le",), key + (le,)
+                ), running
+            yield self.name + "_sum" + _labels(self.labels, key), total
+            yield self.name + "_count" + _labels(self.labels, key), n
+
+    def snapshot(self) -> dict:
+        out = {}
+        for key, counts, total, n in self._items():
+            out[self.name + _labels(self.labels, key)] = {
+                "count": n,
+                "sum": round(total, 6),
+                "buckets": counts,  # per bucket, last one is +Inf
+            }
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Counter | Histogram] = {}
+        self.log_sample_rate = DEFAULT_LOG_SAMPLE_RATE
+
+    def _add(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {_number(value)}" for name, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        snap: dict = {"ts": time.time()}
+        for metric in self.metrics.values():
+            snap.setdefault(metric.kind + "s", {}).update(metric.snapshot())
+        return snap
+
+    def reset(self) -> None:
+        for metric in self.metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+CALLS = REGISTRY.counter(
+    "prompt_audit_calls_total", "Completed chat calls", ("model", "outcome")
+)
+TOKENS = REGISTRY.counter(
+    "prompt_audit_tokens_total", "Prompt/completion tokens", ("model", "direction")
+)
+RETRIES = REGISTRY.counter(
+    "prompt_audit_retries_total", "Retried attempts", ("model", "error")
+)
+ERRORS = REGISTRY.counter(
+    "prompt_audit_errors_total", "Failed attempts per error class", ("model", "error")
+)
+CACHE_HITS = REGISTRY.counter(
+    "prompt_audit_cache_hits_total", "Requests served without a new call", ("cache",)
+)
+LATENCY = REGISTRY.histogram(
+    "prompt_audit_latency_seconds", "Per-call latency by phase", ("model", "phase")
+)
+_PHASES = ("queue_s", "ttft_s", "latency_s")
+
+
+# --------------------------------------------------------------------------- #
+# Hot-path recorders
+# --------------------------------------------------------------------------- #
+def record_call(meta: dict) -> None:
+    """Account one finished call and log it with probability `log_sample_rate`."""
+    model = meta.get("model") or "unknown"
+    CALLS.inc(model, "ok")
+    TOKENS.inc(model, "in", amount=meta.get("prompt_tokens") or 0)
+    TOKENS.inc(model, "out", amount=meta.get("completion_tokens") or 0)
+    for phase in _PHASES:
+        value = meta.get(phase)
+        if value is not None:
+            LATENCY.observe(value, model, phase[:-2])
+    if random.random() < REGISTRY.log_sample_rate:
+        LOGGER.info(json.dumps(meta, default=str))
+
+
+def record_error(meta: dict, exc: BaseException, retried: bool) -> None:
+    """Account one failed attempt; failures that end the call are always logged."""
+    model = meta.get("model") or "unknown"
+    error = type(exc).__name__
+    ERRORS.inc(model, error)
+    if retried:
+        RETRIES.inc(model, error)
+        return
+    CALLS.inc(model, "error")
+    LOGGER.warning(json.dumps({**meta, "error": error}, default=str))
+
+
+def record_cache_hit(cache: str) -> None:
+    CACHE_HITS.inc(cache)
+
+
+# --------------------------------------------------------------------------- #
+# Exporters
+# --------------------------------------------------------------------------- #
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # keep scrapes out of stderr
+        pass
+
+
+class Exporter:
+    """
+    Background exporter.  Every `interval` seconds it appends one NDJSON
+    snapshot to `ndjson_path` and rewrites `prom_path`; `port` serves
+    ``/metrics`` on demand.  `stop()` (also run at exit) flushes once more.
+    """
+
+    def __init__(
+        self,
+        registry: Registry = REGISTRY,
+        ndjson_path: Path | None = None,
+        prom_path: Path | None = None,
+        port: int | None = None,
+        interval: float = 60.0,
+    ):
+        self.registry = registry
+        self.ndjson_path = Path(ndjson_path) if ndjson_path else None
+        self.prom_path = Path(prom_path) if prom_path else None
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.server: ThreadingHTTPServer | None = None
+        if port is not None:
+            handler = type("Handler", (_Handler,), {"registry": registry})
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+    def flush(self) -> None:
+        if self.ndjson_path:
+            with self.ndjson_path.open("a") as fh:
+                fh.write(json.dumps(self.registry.snapshot()) + "\n")
+        if self.prom_path:
+            _write_atomic(self.prom_path, self.registry.prometheus())
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self) -> "Exporter":
+        if self.server is not None:
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        if self.ndjson_path or self.prom_path:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.flush()
+
+
+def start_exporter(cfg) -> Exporter | None:
+    """Start the exporters enabled in `Settings` (none by default)."""
+    REGISTRY.log_sample_rate = cfg.log_sample_rate
+    if not (cfg.metrics_ndjson or cfg.metrics_prom_file or cfg.metrics_port):
+        return None
+    return Exporter(
+        ndjson_path=cfg.metrics_ndjson,
+        prom_path=cfg.metrics_prom_file,
+        port=cfg.metrics_port,
+        interval=cfg.metrics_interval,
+    ).start()
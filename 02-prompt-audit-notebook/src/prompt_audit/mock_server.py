@@ -0,0 +1,317 @@
+# src/prompt_audit/mock_server.py
+"""
+Local OpenAI-compatible mock for load tests: ``POST /v1/chat/completions``
+(JSON or SSE streaming) with sampled latency, injected 429/5xx errors and
+``x-ratelimit-*`` headers from a server-side sliding-window quota.
+
+    python -m prompt_audit.mock_server --port 8099 --latency lognormal:0.3,0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 audit-eval run
+
+``GET /stats`` returns the server's own request/error counters.
+Plain asyncio streams, no extra dependencies; HTTP/1.1 keep-alive only.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+import typer
+
+
+@dataclass
+class MockConfig:
+    latency: str = "lognormal:0.3,0.5"  # fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA
+    ttft_fraction: float = 0.3  # share of the latency spent before the 1st token
+    tokens: int = 8  # completion tokens per reply
+    reply: str = "PASS"  # first word of every reply (the judge looks for PASS)
+    error_429: float = 0.0  # injected rate-limit errors (probability)
+    error_5xx: float = 0.0  # injected 500/502/503 (probability)
+    rpm: int = 10_000  # quota enforced and advertised in headers
+    tpm: int = 10_000_000
+    seed: int | None = None
+
+
+def latency_sampler(spec: str, rng: random.Random):
+    """Callable returning one latency in seconds for a `MockConfig.latency` spec."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+
+def _duration(seconds: float) -> str:
+    return f"{max(seconds, 0.0):.3f}s"
+
+
+@dataclass
+class _Quota:
+    """Sliding one-minute window of (timestamp, tokens) per admitted request."""
+
+    rpm: int
+    tpm: int
+    window: collections.deque = field(default_factory=collections.deque)
+    tokens: int = 0
+
+    def _expire(self, now: float) -> None:
+        while self.window and self.window[0][0] <= now - 60.0:
+            self.tokens -= self.window.popleft()[1]
+
+    def admit(self, tokens: int, now: float) -> float:
+        """Record the request; returns 0 or the seconds until it would fit."""
+        self._expire(now)
+        if len(self.window) >= self.rpm or self.tokens + tokens > self.tpm:
+            return self.window[0][0] + 60.0 - now if self.window else 1.0
+        self.window.append((now, tokens))
+        self.tokens += tokens
+        return 0.0
+
+    def headers(self, now: float) -> dict[str, str]:
+        reset = self.window[0][0] + 60.0 - now if self.window else 0.0
+        return {
+            "x-ratelimit-limit-requests": str(self.rpm),
+            "x-ratelimit-remaining-requests": str(max(self.rpm - len(self.window), 0)),
+            "x-ratelimit-reset-requests": _duration(reset),
+            "x-ratelimit-limit-tokens": str(self.tpm),
+            "x-ratelimit-remaining-tokens": str(max(self.tpm - self.tokens, 0)),
+            "x-ratelimit-reset-tokens": _duration(reset),
+        }
+
+
+_REASONS = {
+    200: "OK",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+
+class MockServer:
+    def __init__(self, config: MockConfig | None = None):
+        self.config = config or MockConfig()
+        self.rng = random.Random(self.config.seed)
+        self.latency = latency_sampler(self.config.latency, self.rng)
+        self.quota = _Quota(self.config.rpm, self.config.tpm)
+        self.stats: collections.Counter = collections.Counter()
+        self._server: asyncio.AbstractServer | None = None
+
+    # ---------------------------------------------------------------- HTTP --
+    async def _handle(self, reader, writer) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self._route(method, path.split("?")[0], body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(
+        self, writer, status: int, payload: dict, headers: dict | None = None
+    ) -> None:
+        body = json.dumps(payload).encode()
+        head = {
+            "content-type": "application/json",
+            "content-length": str(len(body)),
+            **(headers or {}),
+        }
+        writer.write(self._head(status, head) + body)
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: int, headers: dict) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _route(self, method: str, path: str, body: bytes, writer) -> None:
+        if method == "GET" and path == "/stats":
+            await self._send(writer, 200, dict(self.stats))
+        elif method == "POST" and path.endswith("/chat/completions"):
+            await self._completion(json.loads(body or b"{}"), writer)
+        else:
+            await self._send(writer, 404, {"error": {"message": "not found"}})
+
+    # ---------------------------------------------------------- completions --
+    def _error(self, status: int, kind: str, code: str | None = None) -> dict:
+        self.stats[f"status_{status}"] += 1
+        return {"error": {"message": f"mock {kind}", "type": kind, "code": code}}
+
+    async def _completion(self, request: dict, writer) -> None:
+        self.stats["requests"] += 1
+        cfg, now = self.config, time.monotonic()
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in request["messages"])
+        prompt_tokens = max(1, prompt_chars // 4)
+
+        wait = self.quota.admit(prompt_tokens + cfg.tokens, now)
+        injected_429 = not wait and self.rng.random() < cfg.error_429
+        limit_headers = self.quota.headers(now)
+        if wait or injected_429:
+            retry = wait or 0.5
+            headers = {**limit_headers, "retry-after-ms": str(int(retry * 1000))}
+            error = self._error(429, "requests", "rate_limit_exceeded")
+            await self._send(writer, 429, error, headers)
+            return
+        if self.rng.random() < cfg.error_5xx:
+            status = self.rng.choice((500, 502, 503))
+            await asyncio.sleep(self.latency() * cfg.ttft_fraction)
+            await self._send(writer, status, self._error(status, "server_error"))
+            return
+
+        words = [cfg.reply] + ["lorem"] * max(cfg.tokens - 1, 0)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+        base = {
+            "id": f"chatcmpl-mock-{self.stats['requests']}",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+        }
+        latency = self.latency()
+        self.stats["status_200"] += 1
+        if not request.get("stream"):
+            await asyncio.sleep(latency)
+            message = {"role": "assistant", "content": " ".join(words)}
+            payload = {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+            await self._send(writer, 200, payload, limit_headers)
+            return
+        include_usage = (request.get("stream_options") or {}).get("include_usage")
+        await self._stream(
+            writer,
+            base,
+            words,
+            latency,
+            usage if include_usage else None,
+            limit_headers,
+        )
+
+    async def _stream(
+        self, writer, base: dict, words: list[str], latency: float, usage, headers
+    ) -> None:
+        head = {
+            "content-type": "text/event-stream",
+            "transfer-encoding": "chunked",
+            **headers,
+        }
+        writer.write(self._head(200, head))
+
+        async def event(data: str) -> None:
+            chunk = f"data: {data}\n\n".encode()
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+
+        def chunk(delta: dict, finish: str | None = None, choices=True) -> str:
+            body = {**base, "object": "chat.completion.chunk"}
+            body["choices"] = (
+                [{"index": 0, "delta": delta, "finish_reason": finish}]
+                if choices
+                else []
+            )
+            return json.dumps(body)
+
+        ttft = latency * self.config.ttft_fraction
+        gap = (latency - ttft) / max(len(words) - 1, 1)
+        await asyncio.sleep(ttft)
+        await event(chunk({"role": "assistant", "content": ""}))
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(gap)
+            await event(chunk({"content": (" " if i else "") + word}))
+        await event(chunk({}, "stop"))
+        if usage is not None:
+            body = json.loads(chunk({}, choices=False))
+            await event(json.dumps({**body, "usage": usage}))
+        await event("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    # ------------------------------------------------------------ lifecycle --
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(
+            self._handle, host, port, backlog=1024
+        )
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        port = await self.start(host, port)
+        print(f"mock server listening on http://{host}:{port}/v1", flush=True)
+        async with self._server:
+            await self._server.serve_forever()
+
+
+def serve_in_thread(config: MockConfig | None = None) -> tuple[str, MockServer]:
+    """Start a server on a free port in a daemon thread; returns its base URL."""
+    server = MockServer(config)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    port: list[int] = []
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        port.append(loop.run_until_complete(server.start()))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{port[0]}/v1", server
+
+
+def main(
+    host: str = "127.0.0.1",
+    port: int = 8099,
+    latency: str = typer.Option(
+        MockConfig.latency, help="fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA"
+    ),
+    ttft_fraction: float = MockConfig.ttft_fraction,
+    tokens: int = MockConfig.tokens,
+    reply: str = MockConfig.reply,
+    error_429: float = MockConfig.error_429,
+    error_5xx: float = MockConfig.error_5xx,
+    rpm: int = MockConfig.rpm,
+    tpm: int = MockConfig.tpm,
+    seed: int = typer.Option(None),
+):
+    """Serve the mock until interrupted (``--port 0`` picks a free port)."""
+    config = MockConfig(
+        latency, ttft_fraction, tokens, reply, error_429, error_5xx, rpm, tpm, seed
+    )
+    latency_sampler(config.latency, random.Random())  # fail fast on a bad spec
+    try:
+        asyncio.run(MockServer(config).serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,30 @@
+# src/prompt_audit/pricing.py
+"""List prices used for budgets and cost estimates (USD per 1M tokens)."""
+from __future__ import annotations
+
+# (input, output); dated snapshots match on the longest prefix
+PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "o3-mini": (1.10, 4.40),
+    "o4-mini": (1.10, 4.40),
+}
+DEFAULT_PRICE = PRICES["gpt-4o"]  # err on the expensive side for unknown models
+
+
+def price(model: str) -> tuple[float, float]:
+    matches = [name for name in PRICES if model.startswith(name)]
+    return PRICES[max(matches, key=len)] if matches else DEFAULT_PRICE
+
+
+def call_cost(meta: dict) -> float:
+    """Cost of one logged call from its token counts (0 if another call paid)."""
+    if meta.get("coalesced"):
+        return 0.0
+    per_in, per_out = price(meta.get("model", ""))
+    prompt = meta.get("prompt_tokens") or 0
+    completion = meta.get("completion_tokens") or 0
+    return (prompt * per_in + completion * per_out) / 1_000_000
@@ -17,6 +17,11 @@ class Settings(BaseSettings):
         validation_alias="OPENAI_MODEL",
         description="Default chat/completions model",
     )
+    openai_base_url: str | None = Field(
+        None,
+        validation_alias="OPENAI_BASE_URL",
+        description="Alternative API endpoint (proxy, local mock server)",
+    )
     request_timeout: int = Field(
         30,
         validation_alias="OPENAI_REQUEST_TIMEOUT",
@@ -25,7 +30,56 @@ class Settings(BaseSettings):
     max_retries: int = Field(
         6,
         validation_alias="OPENAI_MAX_RETRIES",
-        description="Tenacity retry limit",
+        description="Retry limit for transient (idempotent) failures",
+    )
+    rpm_limit: int = Field(
+        500,
+        validation_alias="OPENAI_RPM_LIMIT",
+        description="Client-side requests/min budget (tightened from headers)",
+    )
+    tpm_limit: int = Field(
+        200_000,
+        validation_alias="OPENAI_TPM_LIMIT",
+        description="Client-side tokens/min budget (tightened from headers)",
+    )
+    max_connections: int = Field(
+        64,
+        validation_alias="OPENAI_MAX_CONNECTIONS",
+        description="Keep-alive HTTP connection pool size",
+    )
+
+    coalesce_requests: bool = Field(
+        True,
+        validation_alias="PROMPT_AUDIT_COALESCE",
+        description="Share one upstream call between concurrent identical temperature-0 "
+        "requests",
+    )
+
+    # telemetry (see prompt_audit.metrics)
+    log_sample_rate: float = Field(
+        0.01,
+        validation_alias="PROMPT_AUDIT_LOG_SAMPLE_RATE",
+        description="Fraction of successful calls logged as a JSON line",
+    )
+    metrics_ndjson: str | None = Field(
+        None,
+        validation_alias="PROMPT_AUDIT_METRICS_NDJSON",
+        description="Append a metrics snapshot to this NDJSON file periodically",
+    )
+    metrics_prom_file: str | None = Field(
+        None,
+        validation_alias="PROMPT_AUDIT_PROM_FILE",
+        description="Rewrite this file with Prometheus text periodically",
+    )
+    metrics_port: int | None = Field(
+        None,
+        validation_alias="PROMPT_AUDIT_METRICS_PORT",
+        description="Serve Prometheus text on http://127.0.0.1:<port>/metrics",
+    )
+    metrics_interval: float = Field(
+        60.0,
+        validation_alias="PROMPT_AUDIT_METRICS_INTERVAL",
+        description="Seconds between snapshot/file exports",
     )
 
     model_config = SettingsConfigDict(
@@ -0,0 +1,213 @@
+# src/prompt_audit/singleflight.py
+"""
+Single-flight coalescing: concurrent callers issuing the same request (same
+canonical hash) share one upstream call.  Streams are fanned out chunk by
+chunk; a caller that joins mid-stream first replays what was already sent.
+A flight is dropped once its upstream call finishes, so this is not a cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator
+
+
+class Flight:
+    """One upstream call shared by `callers` threads."""
+
+    def __init__(self, release: Callable[[], None]):
+        self.callers = 1
+        self.value = None
+        self.meta: dict | None = None
+        self.source: Iterator[str] | None = None  # upstream stream, if any
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._release = release
+        self._pumping = False
+        self._cond = threading.Condition()
+
+    def _finish(self, error: BaseException | None = None) -> None:
+        self._release()  # late arrivals start a new flight from here on
+        with self._cond:
+            self.error, self.done = error, True
+            self._cond.notify_all()
+
+    def detach(self) -> None:
+        """Stop admitting callers; the leader gave up before the end."""
+        self._release()
+
+    def resolve(self, value, meta: dict) -> None:
+        self.value, self.meta = value, meta
+        self._finish()
+
+    def reject(self, exc: BaseException) -> None:
+        self._finish(exc)
+
+    def start_stream(self, source: Iterator[str], meta: dict) -> None:
+        self.source, self.meta = source, meta
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.done or self.source is not None)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def stream(self) -> Iterator[str]:
+        """
+        Replay + follow the shared stream.  Whichever subscriber runs out of
+        buffered chunks advances the upstream iterator, so the stream keeps
+        flowing even if the leader stops reading.
+        """
+        i = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: i < len(self.chunks) or self.done or not self._pumping
+                )
+                if i < len(self.chunks):
+                    chunk = self.chunks[i]
+                elif self.done:
+                    break
+                else:
+                    self._pumping = True
+                    chunk = None
+            if chunk is None:
+                try:
+                    chunk = next(self.source)
+                except StopIteration:
+                    self._finish()
+                    continue
+                except BaseException as exc:
+                    self._finish(exc)
+                    continue
+                finally:
+                    with self._cond:
+                        self._pumping = False
+                        if chunk is not None:
+                            self.chunks.append(chunk)
+                        self._cond.notify_all()
+            i += 1
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+class AsyncFlight:
+    """Async twin of `Flight` (single event loop, no locks needed)."""
+
+    def __init__(self, release: Callable[[], None]):
+        self.callers = 1
+        self.value = None
+        self.meta: dict | None = None
+        self.source: AsyncIterator[str] | None = None
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._release = release
+        self._pumping = False
+        self._cond = asyncio.Condition()
+
+    async def _finish(self, error: BaseException | None = None) -> None:
+        self._release()
+        async with self._cond:
+            self.error, self.done = error, True
+            self._cond.notify_all()
+
+    def detach(self) -> None:
+        self._release()
+
+    async def resolve(self, value, meta: dict) -> None:
+        self.value, self.meta = value, meta
+        await self._finish()
+
+    async def reject(self, exc: BaseException) -> None:
+        await self._finish(exc)
+
+    async def start_stream(self, source: AsyncIterator[str], meta: dict) -> None:
+        self.source, self.meta = source, meta
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def wait(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.done or self.source is not None)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    async def stream(self) -> AsyncIterator[str]:
+        i = 0
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(
+                    lambda: i < len(self.chunks) or self.done or not self._pumping
+                )
+                if i < len(self.chunks):
+                    chunk = self.chunks[i]
+                elif self.done:
+                    break
+                else:
+                    self._pumping = True
+                    chunk = None
+            if chunk is None:
+                try:
+                    chunk = await self.source.__anext__()
+                except StopAsyncIteration:
+                    await self._finish()
+                    continue
+                except BaseException as exc:
+                    await self._finish(exc)
+                    continue
+                finally:
+                    async with self._cond:
+                        self._pumping = False
+                        if chunk is not None:
+                            self.chunks.append(chunk)
+                        self._cond.notify_all()
+            i += 1
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+class SingleFlight:
+    """Registry of in-flight requests plus running coalescing totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[tuple, Flight | AsyncFlight] = {}
+        self.callers = 0  # run_prompt calls that went through the registry
+        self.upstream = 0  # of which actually sent a request
+
+    def join(self, key: str, flight_cls=Flight) -> tuple[Flight | AsyncFlight, bool]:
+        """The flight for `key` and whether the caller leads (must send it)."""
+        if flight_cls is AsyncFlight:  # async flights never cross event loops
+            key = (key, id(asyncio.get_running_loop()))
+        else:
+            key = (key, None)
+        with self._lock:
+            self.callers += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.callers += 1
+                return flight, False
+            self.upstream += 1
+            flight = self._flights[key] = flight_cls(lambda: self._drop(key, flight))
+            return flight, True
+
+    def _drop(self, key: tuple, flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    @property
+    def ratio(self) -> float:
+        """Callers served per upstream request (1.0 = nothing coalesced)."""
+        return self.callers / self.upstream if self.upstream else 1.0
+
+    def stats(self, flight) -> dict:
+        return {"shared_by": flight.callers, "coalesce_ratio": round(self.ratio, 4)}
@@ -1,11 +1,13 @@
+import hashlib
 from pathlib import Path
 from typing import Dict, List
 
 import jinja2
 import yaml
 
+_TEMPLATES = Path(__file__).parent / "templates"
 _ENV = jinja2.Environment(
-    loader=jinja2.FileSystemLoader(Path(__file__).parent / "templates"),
+    loader=jinja2.FileSystemLoader(_TEMPLATES),
     autoescape=False,  # plaintext prompts
     trim_blocks=True,
     lstrip_blocks=True,
@@ -39,3 +41,13 @@ def build_messages(
         *examples,
         {"role": "user", "content": user},
     ]
+
+
+def bundle_id() -> str:
+    """Short content hash of the template set, used to tag runs in the catalog."""
+    digest = hashlib.sha1()
+    for path in sorted(_TEMPLATES.iterdir()):
+        if path.is_file():
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
@@ -0,0 +1,350 @@
+# src/prompt_audit/transport.py
+"""
+Shared transport layer: pooled keep-alive clients, an adaptive requests/min +
+tokens/min limiter, and per-error-class retry policies.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import random
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, Mapping, TypeVar
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from .metrics import record_error
+from .settings import Settings
+
+T = TypeVar("T")
+
+
+# --------------------------------------------------------------------------- #
+# Token-bucket rate limiter
+# --------------------------------------------------------------------------- #
+class TokenBucket:
+    """Continuously refilled bucket holding at most `per_minute` units."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0  # units per second
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Debit `amount` (the level may go negative) and return the wait in s."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)  # oversize calls still get through
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def sync(self, limit: float | None, remaining: float | None, now: float) -> None:
+        """Adopt the server's view of the quota (never more generous than ours)."""
+        self._refill(now)
+        if limit:
+            self.capacity = min(self.capacity, float(limit))
+            self.rate = self.capacity / 60.0
+            self.level = min(self.level, self.capacity)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Drain the bucket so that nothing is admitted for `seconds`."""
+        self._refill(now)
+        self.level = min(self.level, -seconds * self.rate)
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_S = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: str | None) -> float | None:
+    """Parse OpenAI reset strings such as ``"6m0s"``, ``"1.5s"`` or ``"20ms"``."""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(n) * _UNIT_S[unit] for n, unit in parts)
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """
+    Enforce requests/min and tokens/min on the client side.
+
+    Callers reserve capacity up front (one request + the pre-counted tokens) and
+    sleep for the returned wait, so admission is FIFO and never bursts past the
+    quota.  `update_from_headers` tightens the buckets from the
+    ``x-ratelimit-*`` response headers, which also accounts for other
+    processes sharing the same API key.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            return max(self.requests.reserve(1, now), self.tokens.reserve(tokens, now))
+
+    def acquire(self, tokens: int) -> float:
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int) -> float:
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.requests.pause(seconds, now)
+            self.tokens.pause(seconds, now)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        if "x-ratelimit-limit-requests" not in headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                remaining = _parse_int(headers.get(f"x-ratelimit-remaining-{kind}"))
+                bucket.sync(
+                    _parse_int(headers.get(f"x-ratelimit-limit-{kind}")),
+                    remaining,
+                    now,
+                )
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining == 0 and reset:
+                    bucket.pause(reset, now)
+
+
+def request_budget(prompt_tokens: int, kwargs: Mapping[str, Any]) -> int:
+    """Tokens counted against TPM: the prompt plus the requested completion cap."""
+    cap = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 0
+    return prompt_tokens + int(cap)
+
+
+# --------------------------------------------------------------------------- #
+# Retry policies
+# --------------------------------------------------------------------------- #
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Full-jitter exponential backoff for one class of transient error."""
+
+    max_attempts: int
+    base: float = 1.0
+    cap: float = 20.0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+
+# Order matters: APITimeoutError subclasses APIConnectionError.
+# Anything not listed (400/401/403/404/422, content filters, …) is never
+# retried — re-sending the same request cannot change the outcome.
+POLICIES: tuple[tuple[type[Exception], RetryPolicy], ...] = (
+    (openai.RateLimitError, RetryPolicy(max_attempts=8, base=2.0, cap=60.0)),
+    (openai.APITimeoutError, RetryPolicy(max_attempts=3, base=1.0, cap=10.0)),
+    (openai.APIConnectionError, RetryPolicy(max_attempts=6, base=0.5, cap=10.0)),
+    (openai.InternalServerError, RetryPolicy(max_attempts=4, base=1.0, cap=20.0)),
+)
+
+
+def policy_for(exc: BaseException) -> RetryPolicy | None:
+    if isinstance(exc, openai.RateLimitError) and _error_code(exc) == (
+        "insufficient_quota"
+    ):
+        return None  # billing problem, not a transient limit
+    for exc_type, policy in POLICIES:
+        if isinstance(exc, exc_type):
+            return policy
+    return None
+
+
+def _error_code(exc: openai.APIStatusError) -> str | None:
+    return getattr(exc, "code", None)
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    millis = _parse_int(headers.get("retry-after-ms"))
+    if millis is not None:
+        return millis / 1000
+    return _parse_duration(headers.get("retry-after"))
+
+
+def retry_delay(exc: BaseException, attempt: int, max_retries: int) -> float | None:
+    """Seconds to wait before retry `attempt` (0-based), or None to give up."""
+    policy = policy_for(exc)
+    if policy is None or attempt >= min(policy.max_attempts, max_retries):
+        return None
+    return _retry_after(exc) or policy.delay(attempt)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    limiter: RateLimiter,
+    tokens: int,
+    max_retries: int,
+    meta: dict,
+) -> T:
+    """
+    Admit `fn` through `limiter`, retrying only transient failures.  Records
+    the retry count, `queue_s` (limiter wait of the final attempt) and
+    `retry_s` (failed attempts + backoff before it) in `meta`.
+    """
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        admit = time.perf_counter()
+        limiter.acquire(tokens)
+        meta["retry_s"] = admit - start
+        meta["queue_s"] = time.perf_counter() - admit
+        try:
+            return fn()
+        except Exception as exc:
+            delay = retry_delay(exc, attempt, max_retries)
+            record_error(meta, exc, retried=delay is not None)
+            if delay is None:
+                raise
+            attempt += 1
+            meta["retries"] = attempt
+            if isinstance(exc, openai.RateLimitError):
+                limiter.pause(delay)  # hold back every caller, not just this one
+            else:
+                time.sleep(delay)
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    limiter: RateLimiter,
+    tokens: int,
+    max_retries: int,
+    meta: dict,
+) -> T:
+    """Async twin of `call_with_retry`."""
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        admit = time.perf_counter()
+        await limiter.aacquire(tokens)
+        meta["retry_s"] = admit - start
+        meta["queue_s"] = time.perf_counter() - admit
+        try:
+            return await fn()
+        except Exception as exc:
+            delay = retry_delay(exc, attempt, max_retries)
+            record_error(meta, exc, retried=delay is not None)
+            if delay is None:
+                raise
+            attempt += 1
+            meta["retries"] = attempt
+            if isinstance(exc, openai.RateLimitError):
+                limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+
+# --------------------------------------------------------------------------- #
+# Pooled keep-alive clients
+# --------------------------------------------------------------------------- #
+# httpcore re-scans every connection for every queued request, so one big
+# pool costs O(connections × waiters) per hand-off; shards keep that small.
+POOL_SHARD_SIZE = 32
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=30.0,
+    )
+
+
+def build_client(cfg: Settings, limiter: RateLimiter) -> OpenAI:
+    """Synchronous client whose responses feed the limiter."""
+
+    def on_response(response: httpx.Response) -> None:
+        limiter.update_from_headers(response.headers)
+
+    http_client = httpx.Client(
+        limits=_limits(cfg.max_connections),
+        timeout=cfg.request_timeout,
+        event_hooks={"response": [on_response]},
+    )
+    # max_retries=0: retries are owned by call_with_retry, not the SDK
+    return OpenAI(
+        api_key=cfg.openai_api_key,
+        base_url=cfg.openai_base_url,
+        timeout=cfg.request_timeout,
+        max_retries=0,
+        http_client=http_client,
+    )
+
+
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Iterator]"
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def _async_shards(cfg: Settings, limiter: RateLimiter) -> list[AsyncOpenAI]:
+    async def on_response(response: httpx.Response) -> None:
+        limiter.update_from_headers(response.headers)
+
+    shards = max(1, math.ceil(cfg.max_connections / POOL_SHARD_SIZE))
+    per_shard = math.ceil(cfg.max_connections / shards)
+    return [
+        AsyncOpenAI(
+            api_key=cfg.openai_api_key,
+            base_url=cfg.openai_base_url,
+            timeout=cfg.request_timeout,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=_limits(per_shard),
+                timeout=cfg.request_timeout,
+                event_hooks={"response": [on_response]},
+            ),
+        )
+        for _ in range(shards)
+    ]
+
+
+def async_client(cfg: Settings, limiter: RateLimiter) -> AsyncOpenAI:
+    """
+    Shared async client for the running event loop.  Connections cannot cross
+    loops, so each loop gets its own pool (normally there is just one); large
+    pools are split into `POOL_SHARD_SIZE` shards handed out round-robin.
+    """
+    loop = asyncio.get_running_loop()
+    shards = _ASYNC_CLIENTS.get(loop)
+    if shards is None:
+        shards = _ASYNC_CLIENTS[loop] = itertools.cycle(_async_shards(cfg, limiter))
+    return next(shards)
@@ -1,8 +1,10 @@
 # src/prompt_audit/utils.py
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
-from typing import List
+from typing import Any, List
 
 import tiktoken
 
@@ -16,9 +18,20 @@ LOGGER.setLevel(logging.INFO)
 ENC_CACHE: dict[str, tiktoken.Encoding] = {}
 
 
+def _encoding(model: str) -> tiktoken.Encoding:
+    # cache encoding for speed; unknown model names use the current default
+    enc = ENC_CACHE.get(model)
+    if enc is None:
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("o200k_base")
+        ENC_CACHE[model] = enc
+    return enc
+
+
 def count_tokens(messages: List[dict], model: str) -> int:
-    # cache encoding for speed
-    enc = ENC_CACHE.setdefault(model, tiktoken.encoding_for_model(model))
+    enc = _encoding(model)
     num_tokens = 0
     for m in messages:
         num_tokens += 4  # every message overhead (see cookbook)
@@ -26,3 +39,16 @@ def count_tokens(messages: List[dict], model: str) -> int:
             num_tokens += len(enc.encode(v))
     num_tokens += 2  # assistant priming
     return num_tokens
+
+
+def count_text_tokens(text: str, model: str) -> int:
+    """Token count of a plain completion string (used when usage is absent)."""
+    return len(_encoding(model).encode(text))
+
+
+def request_hash(model: str, messages: List[dict], **params: Any) -> str:
+    """Canonical hash of a chat request; byte-identical requests share it."""
+    payload = json.dumps(
+        [model, messages, params], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
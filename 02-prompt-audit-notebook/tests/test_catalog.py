@@ -0,0 +1,113 @@
+import io
+import os
+import sqlite3
+
+import pytest
+from audit_eval import catalog as cat
+from audit_eval import report as rep
+from rich.console import Console
+
+
+def _make_run(path, rows, model="gpt-4o-mini"):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE eval (id TEXT, question TEXT, reference TEXT, answer TEXT, "
+        "judge TEXT, passed INT, latency REAL, cost_usd REAL, tier TEXT, audit TEXT)"
+    )
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+    conn.executemany(
+        "INSERT INTO meta VALUES (?, ?)",
+        [("model", model), ("dataset", "queries.csv@abc"), ("started", 1.0)],
+    )
+    conn.executemany(
+        "INSERT INTO eval VALUES (?,?,?,?,?,?,?,?,?,?)",
+        [
+            (str(i), q, ref, "ans", "PASS", passed, float(i + 1), 0.01, "exact", None)
+            for i, (q, ref, passed) in enumerate(rows)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cat, "OUT_DIR", tmp_path)
+    monkeypatch.setattr(cat, "CATALOG", tmp_path / "catalog.sqlite")
+    return tmp_path
+
+
+def test_sync_indexes_aggregates(outputs):
+    _make_run(outputs / "run_1.sqlite", [("q1", "a", 1), ("q2", "b", 0)])
+    conn = cat.connect()
+    assert cat.sync(conn) == 1
+    assert cat.sync(conn) == 0  # already catalogued
+
+    row = cat.get_run(conn)
+    assert row["run_id"] == "run_1" and row["rows"] == 2
+    assert row["accuracy"] == 0.5 and row["latency_p95"] == 2.0
+    assert [r["run_id"] for r in cat.list_runs(conn, model="gpt-4o-mini")] == ["run_1"]
+    assert list(cat.list_runs(conn, model="other")) == []
+
+
+def test_sync_reindexes_extended_runs(outputs):
+    path = outputs / "run_1.sqlite"
+    _make_run(path, [("q1", "a", 1)])
+    conn = cat.connect()
+    cat.sync(conn)
+
+    run = sqlite3.connect(path)
+    run.execute("INSERT INTO eval (id, question, passed) VALUES ('x', 'q2', 0)")
+    run.commit()
+    run.close()
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))  # coarse-mtime filesystems
+
+    assert cat.sync(conn) == 1
+    assert cat.get_run(conn, "run_1")["rows"] == 2
+
+
+def test_quantiles_nearest_rank(outputs):
+    _make_run(outputs / "run_1.sqlite", [(f"q{i}", "a", 1) for i in range(100)])
+    run = sqlite3.connect(outputs / "run_1.sqlite")
+    assert cat.quantiles(run, "eval", "latency", (0.5, 0.99)) == [50.0, 99.0]
+
+
+def test_diff_reports_regressions(outputs):
+    _make_run(
+        outputs / "run_1.sqlite", [("q1", "a", 1), ("q2", "b", 0), ("q3", "c", 1)]
+    )
+    _make_run(
+        outputs / "run_2.sqlite", [("q1", "a", 0), ("q2", "b", 1), ("q3", "c", 1)]
+    )
+
+    (shared, pass_a, pass_b), changed = rep.diff_runs("run_1", "run_2")
+    assert (shared, pass_a, pass_b) == (3, 2, 2)
+    assert changed == [("q1", "a", 1, 0), ("q2", "b", 0, 1)]
+
+
+def test_diff_pairs_duplicate_rows(outputs):
+    _make_run(outputs / "run_1.sqlite", [("q1", "a", 1), ("q1", "a", 1)])
+    _make_run(outputs / "run_2.sqlite", [("q1", "a", 1), ("q1", "a", 0)])
+
+    (shared, pass_a, pass_b), changed = rep.diff_runs("run_1", "run_2")
+    assert (shared, pass_a, pass_b) == (2, 2, 1)
+    assert changed == [("q1", "a", 1, 0)]
+
+
+def test_render_run_of_empty_run(outputs):
+    _make_run(outputs / "run_1.sqlite", [])
+    console = Console(record=True, width=200)
+    rep.render_run("run_1", console=console)
+    assert "Accuracy n/a" in console.export_text()
+
+
+def test_render_run_writes_markdown(outputs):
+    _make_run(outputs / "run_1.sqlite", [("q|1", "a", 1)])
+    md = rep.render_run(limit=1).read_text(encoding="utf-8")
+    assert "q\\|1" in md and md.startswith("| id | question")
+
+
+def test_render_run_markdown_is_utf8(outputs):
+    _make_run(outputs / "run_1.sqlite", [("Qui a écrit « Ubu roi » ? 🎭", "a", 1)])
+    md = rep.render_run(limit=1, console=Console(file=io.StringIO()))
+    assert "« Ubu roi » ? 🎭" in md.read_text(encoding="utf-8")
@@ -0,0 +1,69 @@
+import json
+
+import audit_eval.dataset as ds
+import pandas as pd
+import pytest
+from audit_eval.cascade import Cascade
+
+
+def _rows(n: int) -> list[dict]:
+    return [
+        {"question": f"Q{i}?", "ground_truth": f"A{i}", "aliases": f"a{i}|b{i}"}
+        for i in range(n)
+    ]
+
+
+def _write(path, rows):
+    if path.suffix == ".csv":
+        pd.DataFrame(rows).to_csv(path, index=False)
+    elif path.suffix == ".jsonl":
+        path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    else:
+        pytest.importorskip("pyarrow")
+        pd.DataFrame(rows).to_parquet(path)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl", ".parquet"])
+def test_iter_rows_streams_every_format(tmp_path, suffix):
+    path = tmp_path / f"queries{suffix}"
+    _write(path, _rows(25))
+    rows = list(ds.iter_rows(path, batch_size=7))
+    assert len(rows) == 25
+    assert rows[3] == ("Q3?", "A3", ["a3", "b3"], ds.row_key("Q3?", "A3"))
+
+
+def test_sample_is_stable_as_data_grows(tmp_path):
+    small, large = tmp_path / "small.csv", tmp_path / "large.csv"
+    _write(small, _rows(1_000))
+    _write(large, _rows(5_000))
+
+    keys = lambda p, f: {r[3] for r in ds.iter_rows(p, f, batch_size=300)}  # noqa
+    sample_small, sample_large = keys(small, 0.2), keys(large, 0.2)
+    assert sample_small <= sample_large  # old rows keep their membership
+    assert 800 < len(sample_large) < 1_200
+    assert keys(large, 0.1) <= sample_large  # smaller fraction is a subset
+    assert {r[3] for r in ds.iter_rows(large, 0.2, random_state=7)} != sample_large
+
+
+def test_load_matches_iter_rows(tmp_path):
+    path = tmp_path / "queries.csv"
+    _write(path, _rows(200))
+    df = ds.load(0.3, path=path)
+    assert list(df["row_key"]) == [r[3] for r in ds.iter_rows(path, 0.3)]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".parquet"])
+def test_numeric_references_are_read_as_text(tmp_path, suffix):
+    path = tmp_path / f"queries{suffix}"
+    _write(path, [{"question": "2+2?", "ground_truth": 4, "aliases": None}])
+    ((question, reference, aliases, _),) = ds.iter_rows(path)
+    assert (question, reference, aliases) == ("2+2?", "4", [])
+    assert Cascade().grade(reference, "It is 4.").passed
+
+
+def test_tiny_fraction_still_selects_one_row(tmp_path):
+    path = tmp_path / "queries.csv"
+    _write(path, _rows(20))
+    rows = list(ds.iter_rows(path, 1e-9, batch_size=7))
+    assert len(rows) == 1 and rows == list(ds.iter_rows(path, 1e-9, batch_size=3))
+    assert len(ds.load(1e-9, path=path)) == 1
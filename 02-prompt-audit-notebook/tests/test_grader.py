@@ -0,0 +1,84 @@
+import pytest
+from audit_eval.cascade import (
+    Cascade,
+    fuzzy_tier,
+    normalize,
+    numeric_tier,
+    parse_date,
+    split_aliases,
+    token_set_ratio,
+)
+
+
+def test_normalize_strips_articles_punctuation_and_accents():
+    assert normalize("The  Café, São-Paulo!") == "cafe sao paulo"
+
+
+def test_numeric_units_and_separators():
+    assert numeric_tier("5 km", "It is 5,000 metres long.", []).passed
+    assert numeric_tier("1200000", "about 1.2 million people", []).passed
+    assert not numeric_tier("42", "The answer is 41.", []).passed
+    assert numeric_tier("1990", "born in 1990 in Paris", []).passed
+
+
+def test_date_formats():
+    assert parse_date("July 4th, 1776") == parse_date("1776-07-04")
+
+
+@pytest.mark.parametrize(
+    "reference, answer, expected",
+    [
+        ("July 1969", "Apollo 11 landed on July 20, 1969.", True),
+        ("July 1969", "It was in August 1969.", False),
+        ("1969-07-20", "Some time in July 1969.", None),
+        ("1969-07-20", "On 21 July 1969.", False),
+        ("1.5 million", "About 1.5m people live there.", None),
+        ("1.5 million", "About 2m people live there.", None),
+        ("42", "The answer is 41 apples.", None),
+    ],
+)
+def test_local_fail_needs_a_comparable_figure(reference, answer, expected):
+    verdict = Cascade().grade(reference, answer)
+    assert (verdict and verdict.passed) == expected
+
+
+def test_token_set_ratio_ignores_order():
+    assert token_set_ratio("barack obama", "obama barack") == 1.0
+    assert token_set_ratio("dwight eisenhower", "dwight eisenhwer") > 0.92
+
+
+@pytest.mark.parametrize(
+    "reference, answer",
+    [
+        ("New York City", "York"),
+        ("Marie Curie", "Curie"),
+        ("George W. Bush", "George Bush"),
+        ("World War II", "World War I"),
+        ("Apollo 11", "Apollo 13"),
+    ],
+)
+def test_fuzzy_tier_sends_subsets_and_near_numbers_to_judge(reference, answer):
+    verdict = fuzzy_tier(reference, answer, [])
+    assert verdict is None or verdict.confidence < 0.92
+    assert Cascade().grade(reference, answer) is None
+
+
+def test_cascade_tiers_and_hits():
+    cascade = Cascade()
+    assert cascade.grade("Paris", "It's Paris.").tier == "exact"
+    assert cascade.grade("NYC", "New York City", ["New York City"]).tier == "alias"
+    assert cascade.grade("the Beatles", "Beatles!").tier == "normalized"
+    assert cascade.grade("1776-07-04", "On 4 July 1776.").tier == "date"
+    assert cascade.grade("Marie Curie", "Physicist Pierre Curie") is None
+    assert cascade.hits["judge"] == 1 and sum(cascade.hits.values()) == 5
+
+
+def test_audit_sampling_is_seeded():
+    draws = [Cascade(audit_rate=0.5, seed=1).should_audit() for _ in range(3)]
+    assert len(set(draws)) == 1
+    assert not Cascade().should_audit()
+
+
+def test_split_aliases():
+    assert split_aliases("NYC | New York|") == ["NYC", "New York"]
+    assert split_aliases(float("nan")) == []
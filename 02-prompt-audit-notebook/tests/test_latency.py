@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from prompt_audit.client import run_prompt
+from prompt_audit.latency import CallClock, percentile
+
+
+def _chunk(text: str | None = None, usage=None):
+    choices = (
+        [] if text is None else [SimpleNamespace(delta=SimpleNamespace(content=text))]
+    )
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(range(1, 101), 99) == 99
+
+
+def test_clock_without_stream_has_single_tick():
+    clock = CallClock()
+    clock.mark_sent(0.0)
+    clock.tick()
+    stats = clock.summary(completion_tokens=10)
+    assert stats["itl_p50_s"] is None
+    assert stats["ttft_s"] <= stats["latency_s"]
+
+
+@patch("prompt_audit.client.count_tokens", return_value=12)
+@patch("prompt_audit.client.client.chat.completions.create")
+def test_stream_reports_true_tokens_and_ttft(mock_create, _count):
+    usage = SimpleNamespace(completion_tokens=3)
+    mock_create.return_value = iter(
+        [_chunk("Hel"), _chunk("lo"), _chunk("!"), _chunk(usage=usage)]
+    )
+
+    gen, meta = run_prompt(
+        [{"role": "user", "content": "hi"}], stream=True, return_meta=True
+    )
+    assert "".join(gen) == "Hello!"
+    assert meta["completion_tokens"] == 3  # from usage, not len(delta)
+    assert meta["total_tokens"] == 15
+    assert meta["ttft_s"] is not None and meta["itl_p95_s"] is not None
+    assert mock_create.call_args.kwargs["stream_options"] == {"include_usage": True}
@@ -0,0 +1,98 @@
+import sqlite3
+import uuid
+
+import audit_eval.catalog as cat
+import audit_eval.grader as gr
+import audit_eval.matrix as mx
+import pytest
+
+
+@pytest.fixture
+def fake_llm(tmp_path, monkeypatch):
+    monkeypatch.setattr(gr, "_OUT_DIR", tmp_path)
+    monkeypatch.setattr(cat, "CATALOG", tmp_path / "catalog.sqlite")
+    sent = []
+
+    async def fake(messages, model=None, return_meta=False, **_):
+        sent.append(model)
+        meta = {
+            "id": str(uuid.uuid4()),
+            "model": model,
+            "prompt_tokens": 1000,
+            "completion_tokens": 0,
+        }
+        return "Paris", meta
+
+    monkeypatch.setattr(mx, "arun_prompt", fake)
+    return sent
+
+
+ROWS = [
+    ("Capital of France?", "Paris", [], "k1"),
+    ("Capital of Peru?", "Lima", [], "k2"),
+]
+
+
+def test_identical_variants_share_requests(fake_llm):
+    variants = {"a": {}, "b": {}}  # render identical messages
+    result = mx.run_matrix(ROWS, ["gpt-4o-mini"], variants)
+
+    assert result.requests == 2 + 1  # one answer per row + one judge (Lima row)
+    assert result.shared == 2 + 1
+    assert [c.rows for c in result.cells] == [2, 2]
+    for cell in result.cells:
+        run = sqlite3.connect(cell.db_path)
+        assert run.execute("SELECT COUNT(*) FROM eval").fetchone() == (2,)
+        meta = dict(run.execute("SELECT key, value FROM meta"))
+        assert meta["prompt_bundle"].endswith(f":{cell.variant}")
+    indexed = cat.connect().execute("SELECT COUNT(*) FROM runs").fetchone()
+    assert indexed[0] == 2
+
+
+def test_repeated_questions_share_across_rows_and_cost_once(fake_llm):
+    rows = [("Capital of France?", "Paris", [], f"k{i}") for i in range(3)]
+    result = mx.run_matrix(rows, ["gpt-4o-mini", "gpt-4o"], {"a": {}, "b": {}})
+
+    assert fake_llm == ["gpt-4o-mini", "gpt-4o"]  # one answer per model
+    assert result.shared == 3 * 4 - 2
+    cell_costs = sum(c.cost_usd for c in result.cells)
+    assert cell_costs == pytest.approx(result.spent_usd) and result.spent_usd > 0
+    run = sqlite3.connect(result.cells[0].db_path)
+    assert run.execute("SELECT SUM(cost_usd) FROM eval").fetchone()[0] > 0
+
+
+def test_duplicate_rows_in_one_cell_get_their_own_calls(fake_llm):
+    rows = [("Capital of France?", "Paris", [], "k1")] * 2
+    result = mx.run_matrix(rows, ["gpt-4o-mini"], {"a": {}})
+
+    assert fake_llm == ["gpt-4o-mini"] and result.shared == 1
+    run = sqlite3.connect(result.cells[0].db_path)
+    assert run.execute("SELECT COUNT(*) FROM eval").fetchone() == (2,)
+    ids = run.execute("SELECT id FROM calls").fetchall()
+    assert len(ids) == len(set(ids)) == 2
+
+
+def test_failed_call_still_closes_and_indexes_cells(fake_llm, monkeypatch):
+    async def boom(messages, model=None, return_meta=False, **_):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(mx, "arun_prompt", boom)
+    with pytest.raises(RuntimeError):
+        mx.run_matrix(ROWS, ["gpt-4o-mini"], {"a": {}})
+    indexed = cat.connect().execute("SELECT COUNT(*) FROM runs").fetchone()
+    assert indexed[0] == 1
+
+
+def test_budget_stops_new_work(fake_llm):
+    result = mx.run_matrix(
+        ROWS * 5, ["gpt-4o", "gpt-4o-mini"], {"a": {}}, concurrency=1, budget_usd=1e-9
+    )
+    assert result.stopped_early
+    assert sum(c.rows for c in result.cells) == 1
+
+
+def test_load_variants_rejects_unknown_keys(tmp_path):
+    path = tmp_path / "variants.yml"
+    path.write_text("short:\n  temperature: 0.2\n")
+    with pytest.raises(ValueError, match="temperature"):
+        mx.load_variants(path)
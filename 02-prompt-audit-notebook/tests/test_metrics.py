@@ -0,0 +1,111 @@
+import json
+import urllib.request
+
+import httpx
+import openai
+import pytest
+from prompt_audit import metrics
+from prompt_audit.transport import call_with_retry
+
+
+class _NoWait:
+    def acquire(self, tokens):
+        return 0.0
+
+    def pause(self, seconds):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+def test_record_call_updates_counters_and_histograms():
+    meta = {"model": "m", "prompt_tokens": 10, "completion_tokens": 3}
+    metrics.record_call({**meta, "latency_s": 0.2, "ttft_s": 0.05})
+    metrics.record_call({**meta, "latency_s": 7.0})
+
+    assert metrics.CALLS.value("m", "ok") == 2
+    assert metrics.TOKENS.value("m", "in") == 20
+    assert metrics.TOKENS.value("m", "out") == 6
+    assert metrics.LATENCY.count("m", "latency") == 2
+    assert metrics.LATENCY.count("m", "ttft") == 1
+
+    text = metrics.REGISTRY.prometheus()
+    assert "# TYPE prompt_audit_latency_seconds histogram" in text
+    assert (
+        'prompt_audit_latency_seconds_bucket{model="m",phase="latency",le="0.25"} 1'
+        in text
+    )
+    assert (
+        'prompt_audit_latency_seconds_bucket{model="m",phase="latency",le="+Inf"} 2'
+        in text
+    )
+
+
+def test_retries_and_errors_per_class(monkeypatch):
+    monkeypatch.setattr("prompt_audit.transport.time.sleep", lambda s: None)
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    outcomes = [openai.APIConnectionError(request=request), "ok"]
+
+    def fn():
+        out = outcomes.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    meta = {"model": "m"}
+    assert call_with_retry(fn, _NoWait(), 1, 3, meta) == "ok"
+    assert metrics.RETRIES.value("m", "APIConnectionError") == 1
+    assert metrics.ERRORS.value("m", "APIConnectionError") == 1
+    assert metrics.CALLS.value("m", "error") == 0
+
+
+def test_log_line_is_sampled(monkeypatch, caplog):
+    monkeypatch.setattr(metrics.REGISTRY, "log_sample_rate", 0.0)
+    with caplog.at_level("INFO", logger="prompt-audit"):
+        metrics.record_call({"model": "m"})
+    assert caplog.records == []
+    assert metrics.CALLS.value("m", "ok") == 1
+
+
+def test_exporter_writes_ndjson_prom_file_and_serves(tmp_path):
+    metrics.record_cache_hit("matrix")
+    exporter = metrics.Exporter(
+        ndjson_path=tmp_path / "m.ndjson", prom_path=tmp_path / "m.prom", port=0
+    )
+    port = exporter.server.server_address[1]
+    exporter.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+            assert b'prompt_audit_cache_hits_total{cache="matrix"} 1' in resp.read()
+    finally:
+        exporter.stop()
+
+    snap = json.loads((tmp_path / "m.ndjson").read_text().splitlines()[-1])
+    assert snap["counters"]['prompt_audit_cache_hits_total{cache="matrix"}'] == 1
+    assert (
+        "# TYPE prompt_audit_calls_total counter" in (tmp_path / "m.prom").read_text()
+    )
+
+
+def test_prometheus_escapes_label_values():
+    counter = metrics.Counter("c_total", "test", ("model",))
+    counter.inc('my "fine"\\tuned\nmodel')
+    (line,) = (text for text, _ in counter.samples())
+    assert line == 'c_total{model="my \\"fine\\"\\\\tuned\\nmodel"}'
+
+
+def test_prometheus_keeps_full_precision():
+    registry = metrics.Registry()
+    counter = registry.counter("t_total", "test")
+    counter.inc(amount=12_345_678)
+    hist = registry.histogram("h_seconds", "test", buckets=(1.0,))
+    hist.observe(0.123456789)
+    text = registry.prometheus()
+    assert "t_total 12345678\n" in text
+    assert "h_seconds_sum 0.123456789\n" in text
+    assert 'h_seconds_bucket{le="1.0"} 1\n' in text
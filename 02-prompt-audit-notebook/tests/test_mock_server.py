@@ -0,0 +1,60 @@
+import random
+
+import openai
+import pytest
+from prompt_audit.mock_server import MockConfig, latency_sampler, serve_in_thread
+from prompt_audit.transport import RateLimiter
+
+
+def _client(config: MockConfig) -> openai.OpenAI:
+    url, _ = serve_in_thread(config)
+    return openai.OpenAI(api_key="mock", base_url=url, max_retries=0)
+
+
+MESSAGES = [{"role": "user", "content": "What is the capital of France?"}]
+
+
+def test_completion_and_stream_with_usage():
+    client = _client(MockConfig(latency="fixed:0", tokens=3, reply="Paris"))
+
+    resp = client.chat.completions.create(model="m", messages=MESSAGES)
+    assert resp.choices[0].message.content == "Paris lorem lorem"
+    assert resp.usage.completion_tokens == 3
+
+    chunks = list(
+        client.chat.completions.create(
+            model="m",
+            messages=MESSAGES,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+    )
+    text = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    assert text == "Paris lorem lorem"
+    assert chunks[-1].usage.completion_tokens == 3
+
+
+def test_quota_429_carries_rate_limit_headers():
+    client = _client(MockConfig(latency="fixed:0", rpm=1))
+    raw = client.chat.completions.with_raw_response.create(model="m", messages=MESSAGES)
+    limiter = RateLimiter(rpm=100, tpm=100_000)
+    limiter.update_from_headers(raw.headers)
+    assert limiter.requests.capacity == 1  # tightened to the server's quota
+
+    with pytest.raises(openai.RateLimitError) as err:
+        client.chat.completions.create(model="m", messages=MESSAGES)
+    assert int(err.value.response.headers["retry-after-ms"]) > 0
+
+
+def test_injected_server_errors():
+    client = _client(MockConfig(latency="fixed:0", error_5xx=1.0))
+    with pytest.raises(openai.InternalServerError):
+        client.chat.completions.create(model="m", messages=MESSAGES)
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert latency_sampler("fixed:0.2", rng)() == 0.2
+    assert 0.1 <= latency_sampler("uniform:0.1,0.3", rng)() <= 0.3
+    with pytest.raises(ValueError):
+        latency_sampler("gamma:1", rng)
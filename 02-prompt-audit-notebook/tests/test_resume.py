@@ -0,0 +1,113 @@
+import sqlite3
+
+import audit_eval.catalog as cat
+import audit_eval.grader as gr
+import pytest
+from audit_eval import cli
+from audit_eval.dataset import fingerprint, row_key
+from audit_eval.report import latency_summary
+from typer.testing import CliRunner
+
+
+@pytest.fixture
+def fresh_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(gr, "_OUT_DIR", tmp_path)
+    gr.close_run()
+    yield tmp_path
+    gr.close_run()
+
+
+def test_row_key_is_stable_and_field_sensitive():
+    assert row_key("Q?", "A") == row_key("Q?", "A")
+    assert row_key("Q?", "A") != row_key("Q?A", "")
+
+
+def test_resume_migrates_old_run_and_skips_graded_rows(fresh_run):
+    old = sqlite3.connect(fresh_run / "run_1.sqlite")
+    old.execute(
+        "CREATE TABLE eval (id TEXT PRIMARY KEY, question TEXT, reference TEXT, "
+        "answer TEXT, judge TEXT, passed INT, latency REAL, cost_usd REAL)"
+    )
+    old.execute("INSERT INTO eval VALUES ('1', 'Q?', 'A', 'A', 'PASS', 1, 0.1, 0.5)")
+    old.commit()
+    old.close()
+
+    gr.open_run("run_1")
+    assert gr.done_keys() == {row_key("Q?", "A"): 1}
+    assert gr.progress() == (1, 1, 0.5)
+
+    gr._record("Q2?", "B", "no", "FAIL", False, 0.1, {}, "judge")
+    assert gr.checkpoint()[:2] == (2, 1)
+    assert len(gr.done_keys()) == 2
+
+
+def test_resume_unknown_run(fresh_run):
+    with pytest.raises(FileNotFoundError):
+        gr.open_run("run_missing")
+
+
+@pytest.mark.parametrize("run_id", ["../run_1", "sub/run_1", "..", "run\\1"])
+def test_resume_rejects_paths_as_run_ids(fresh_run, run_id):
+    with pytest.raises(ValueError):
+        gr.open_run(run_id)
+
+
+def test_resume_refuses_different_dataset(fresh_run):
+    data = fresh_run / "queries.csv"
+    data.write_text("question,ground_truth\nQ?,A\n")
+    conn = gr.init_run_db(fresh_run / "run_1.sqlite")
+    gr.annotate_db(conn, dataset="queries.csv@000000000000", data=str(data))
+    conn.close()
+
+    result = CliRunner().invoke(cli.app, ["run", "--resume", "run_1"])
+    assert result.exit_code == 1
+    assert gr.run_meta()["dataset"] == "queries.csv@000000000000"
+
+
+def test_resume_refuses_different_model(fresh_run):
+    data = fresh_run / "queries.csv"
+    data.write_text("question,ground_truth\nQ?,A\n")
+    conn = gr.init_run_db(fresh_run / "run_1.sqlite")
+    gr.annotate_db(
+        conn, dataset=fingerprint(data), data=str(data), model="some-older-model"
+    )
+    conn.close()
+
+    result = CliRunner().invoke(cli.app, ["run", "--resume", "run_1"])
+    assert result.exit_code == 1
+    assert gr.run_meta()["model"] == "some-older-model"
+
+
+def test_resume_grades_remaining_duplicate_rows(fresh_run, monkeypatch):
+    monkeypatch.setattr(cat, "CATALOG", fresh_run / "catalog.sqlite")
+    data = fresh_run / "queries.csv"
+    data.write_text("question,ground_truth\nQ?,A\nQ?,A\nQ2?,B\n")
+    gr.open_run()
+    gr.annotate_run(dataset=fingerprint(data), data=str(data))
+    gr._record("Q?", "A", "A", "PASS", True, 0.1, {}, "exact")
+    run_id = gr.run_path().stem
+    gr.close_run()
+    graded = []
+
+    async def fake_grade(question, reference, aliases=(), row_key=None):
+        graded.append(question)
+        return True
+
+    monkeypatch.setattr(gr, "agrade_row", fake_grade)
+    result = CliRunner().invoke(cli.app, ["run", "--resume", run_id])
+    assert result.exit_code == 0, result.output
+    assert sorted(graded) == ["Q2?", "Q?"]
+
+
+def test_calls_store_retry_time_and_migrate_old_runs(fresh_run):
+    old = gr.init_run_db(fresh_run / "run_1.sqlite")
+    old.execute("ALTER TABLE calls DROP COLUMN retry_s")  # as before the column
+    old.close()
+
+    gr.open_run("run_1")
+    meta = {"id": "c1", "queue_s": 0.01, "retry_s": 2.5, "latency_s": 3.0}
+    gr._record("Q?", "A", "A", "PASS", True, 3.0, {"answer": meta}, "exact")
+    run = sqlite3.connect(gr.run_path())
+    assert run.execute("SELECT retry_s FROM calls").fetchone() == (2.5,)
+    p50 = latency_summary(run)[0]
+    assert p50[:4] == ("answer", "p50", 0.01, 2.5)
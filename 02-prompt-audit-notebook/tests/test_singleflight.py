@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import prompt_audit.client as pc
+from prompt_audit.client import arun_prompt, run_prompt
+from prompt_audit.pricing import call_cost
+
+MESSAGES = [{"role": "user", "content": "Capital of France?"}]
+
+
+def _resp(text: str):
+    message = SimpleNamespace(content=text)
+    usage = SimpleNamespace(completion_tokens=1, total_tokens=5)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _chunk(text: str | None = None, usage=None):
+    choices = (
+        [] if text is None else [SimpleNamespace(delta=SimpleNamespace(content=text))]
+    )
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _wait_for_callers(n: int) -> None:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        flights = list(pc.FLIGHTS._flights.values())
+        if flights and flights[0].callers >= n:
+            return
+        time.sleep(0.001)
+
+
+@patch("prompt_audit.client.count_tokens", return_value=4)
+@patch("prompt_audit.client.client.chat.completions.create")
+def test_concurrent_identical_calls_share_one_request(mock_create, _count):
+    release = threading.Event()
+
+    def slow_create(**_):
+        release.wait(5)
+        return _resp("Paris")
+
+    mock_create.side_effect = slow_create
+    results = []
+
+    def call():
+        results.append(run_prompt(MESSAGES, return_meta=True, temperature=0))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    _wait_for_callers(3)
+    release.set()
+    for t in threads:
+        t.join()
+
+    mock_create.assert_called_once()
+    assert [text for text, _ in results] == ["Paris"] * 3
+    metas = [meta for _, meta in results]
+    assert sorted(m["coalesced"] for m in metas) == [False, True, True]
+    assert all(m["shared_by"] == 3 for m in metas)
+
+
+@patch("prompt_audit.client.count_tokens", return_value=4)
+def test_async_stream_fans_out_to_every_caller(_count):
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+
+        async def chunks():
+            for text in ("Pa", "ri", "s"):
+                await asyncio.sleep(0.01)
+                yield _chunk(text)
+            yield _chunk(usage=SimpleNamespace(completion_tokens=3))
+
+        return chunks()
+
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    async def consume():
+        gen, meta = await arun_prompt(
+            MESSAGES, stream=True, return_meta=True, temperature=0
+        )
+        return "".join([d async for d in gen]), meta
+
+    async def main():
+        return await asyncio.gather(*(consume() for _ in range(4)))
+
+    with patch("prompt_audit.client.async_client", return_value=fake):
+        results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [text for text, _ in results] == ["Paris"] * 4
+    leader = next(m for _, m in results if not m["coalesced"])
+    for _, meta in results:
+        assert meta["shared_by"] == 4
+        assert meta["completion_tokens"] == leader["completion_tokens"]
+
+
+@patch("prompt_audit.client.count_tokens", return_value=4)
+@patch("prompt_audit.client.client.chat.completions.create")
+def test_coalescing_can_be_disabled(mock_create, _count):
+    mock_create.return_value = _resp("Paris")
+    run_prompt(MESSAGES, coalesce=False)
+    run_prompt(MESSAGES, coalesce=False)
+    assert mock_create.call_count == 2
+
+
+@patch("prompt_audit.client.count_tokens", return_value=4)
+@patch("prompt_audit.client.client.chat.completions.create")
+def test_sampled_calls_are_not_coalesced(mock_create, _count):
+    release = threading.Event()
+
+    def slow_create(**_):
+        release.wait(5)
+        return _resp("Paris")
+
+    mock_create.side_effect = slow_create
+    threads = [
+        threading.Thread(target=run_prompt, args=(MESSAGES,), kwargs=kwargs)
+        for kwargs in ({}, {}, {"temperature": 0.7}, {"temperature": 0.7})
+    ]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while mock_create.call_count < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert mock_create.call_count == 4
+    assert not pc.FLIGHTS._flights
+
+
+@patch("prompt_audit.client.count_tokens", return_value=4)
+@patch("prompt_audit.client.client.chat.completions.create")
+def test_abandoned_stream_releases_its_flight(mock_create, _count):
+    mock_create.return_value = iter([_chunk("Pa"), _chunk("ri"), _chunk("s")])
+    gen = run_prompt(MESSAGES, stream=True, temperature=0)
+    assert next(gen) == "Pa"
+    gen.close()
+
+    assert not pc.FLIGHTS._flights
+    usage = SimpleNamespace(completion_tokens=1)
+    mock_create.return_value = iter([_chunk("Paris"), _chunk(usage=usage)])
+    assert "".join(run_prompt(MESSAGES, stream=True, temperature=0)) == "Paris"
+    assert mock_create.call_count == 2
+
+
+@patch("prompt_audit.client.count_tokens", return_value=4)
+@patch("prompt_audit.client.client.chat.completions.create")
+def test_followers_are_not_billed(mock_create, _count):
+    release = threading.Event()
+
+    def slow_create(**_):
+        release.wait(5)
+        return _resp("Paris")
+
+    mock_create.side_effect = slow_create
+    metas = []
+
+    def call():
+        metas.append(run_prompt(MESSAGES, return_meta=True, temperature=0)[1])
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    _wait_for_callers(3)
+    release.set()
+    for t in threads:
+        t.join()
+
+    leader = next(m for m in metas if not m["coalesced"])
+    assert call_cost(leader) > 0
+    assert sum(call_cost(m) for m in metas) == call_cost(leader)
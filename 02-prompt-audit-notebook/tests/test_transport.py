@@ -0,0 +1,96 @@
+import time
+
+import httpx
+import openai
+from prompt_audit.transport import (
+    RateLimiter,
+    TokenBucket,
+    _parse_duration,
+    call_with_retry,
+    request_budget,
+    retry_delay,
+)
+
+_REQ = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(cls, status: int, headers: dict | None = None):
+    resp = httpx.Response(status, headers=headers or {}, request=_REQ)
+    return cls("boom", response=resp, body=None)
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)  # one unit per second
+    assert bucket.reserve(60, now=bucket.stamp) == 0.0
+    assert bucket.reserve(2, now=bucket.stamp) == 2.0
+
+
+def test_limiter_enforces_tpm_with_prompt_tokens():
+    limiter = RateLimiter(rpm=1_000, tpm=600)
+    assert limiter.reserve(request_budget(500, {"max_tokens": 100})) == 0.0
+    assert limiter.reserve(60) > 5.0  # ~6 s at 10 tokens/s
+
+
+def test_limiter_adopts_headers():
+    limiter = RateLimiter(rpm=10_000, tpm=10_000_000)
+    limiter.update_from_headers(
+        {
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "1s",
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-tokens": "1000",
+        }
+    )
+    assert limiter.requests.capacity == 60
+    assert limiter.reserve(1) >= 1.0
+
+
+def test_bucket_sync_never_raises_capacity():
+    bucket = TokenBucket(per_minute=100)
+    bucket.sync(limit=1_000, remaining=None, now=bucket.stamp)
+    assert bucket.capacity == 100
+
+
+def test_parse_duration():
+    assert _parse_duration("6m0s") == 360
+    assert _parse_duration("20ms") == 0.02
+    assert _parse_duration("1.5s") == 1.5
+
+
+def test_retry_policy_per_error_class():
+    assert retry_delay(_status_error(openai.BadRequestError, 400), 0, 6) is None
+    assert retry_delay(_status_error(openai.InternalServerError, 500), 0, 6) is not None
+    assert retry_delay(_status_error(openai.InternalServerError, 500), 4, 6) is None
+    limited = _status_error(openai.RateLimitError, 429, {"retry-after-ms": "250"})
+    assert retry_delay(limited, 0, 6) == 0.25
+
+
+def test_call_with_retry_only_retries_transient(monkeypatch):
+    monkeypatch.setattr("prompt_audit.transport.time.sleep", lambda s: None)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            busy_until = time.perf_counter() + 0.01  # failed attempts take time too
+            while time.perf_counter() < busy_until:
+                pass
+            raise openai.APIConnectionError(request=_REQ)
+        return "ok"
+
+    meta: dict = {}
+    out = call_with_retry(flaky, RateLimiter(10_000, 10_000_000), 10, 6, meta)
+    assert out == "ok" and meta["retries"] == 2
+    assert meta["retry_s"] >= 0.02 > meta["queue_s"]  # retries are not queueing
+
+    def bad():
+        raise _status_error(openai.AuthenticationError, 401)
+
+    calls.clear()
+    try:
+        call_with_retry(bad, RateLimiter(10_000, 10_000_000), 10, 6, {})
+    except openai.AuthenticationError:
+        pass
+    else:  # pragma: no cover
+        raise AssertionError("401 must not be retried")